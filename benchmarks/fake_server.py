@@ -0,0 +1,221 @@
+"""A local stand-in for the Normal API, for benchmarks and trying things out offline.
+
+Implements every endpoint the client uses with made up but correctly shaped responses,
+plus configurable latency, errors, 429s and payload sizes.
+
+    python benchmarks/fake_server.py --port 8080 --latency 0.02 --error-rate 0.01
+    normal_api.Client(api_url = "http://127.0.0.1:8080/")
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from normal_api import local  # noqa: E402
+
+
+class FakeConfig:
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        ratelimit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        payload_size: int = 0,
+        image_size: int = 64 * 1024,
+        seed: int = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.ratelimit_rate = ratelimit_rate
+        self.retry_after = retry_after
+        self.payload_size = payload_size
+        self.image_size = image_size
+        self.random = random.Random(seed)
+
+
+def _padding(config: FakeConfig) -> str:
+    return "x" * config.payload_size
+
+
+def _invite(request, config):
+    code = request.query.get("code", "")
+    if code.startswith("invalid"):
+        return web.json_response({"status": 404, "error": "Unknown Invite"}, status = 404)
+    return {
+        "code": code, "url": f"https://discord.gg/{code}", "inviter_tag": "Soheab_#6240",
+        "inviter_id": "150665783268212746", "guild_name": "Fake Guild", "guild_members": "420",
+        "guild_id": "681882711945641997", "guild_description": _padding(config) or "undefined",
+        "guild_features": "COMMUNITY,NEWS", "channel_name": "welcome", "channel_id": "681882712390369290",
+    }
+
+
+def _template(request, config):
+    code = request.query.get("code", "")
+    return {
+        "code": code, "url": f"https://discord.new/{code}", "description": _padding(config) or "undefined",
+        "usage_count": "1234", "roles": "Admin,Mod,Member", "channels": "general,memes,rules",
+        "creator_tag": "Soheab_#6240", "creator_id": "150665783268212746", "guild_name": "Fake Template",
+        "guild_id": "681882711945641997", "guild_region": "europe", "guild_verification_level": "1",
+    }
+
+
+def _user(request, config):
+    user_id = request.query.get("userid", "0")
+    return {
+        "username": "Fake", "id": user_id, "discrim": "0001", "tag": "Fake#0001", "user_status": "online",
+        "status_type": "PLAYING", "custom_status": _padding(config) or "null", "custom_status_emoji": "null",
+    }
+
+
+def _image_url(request, name):
+    return str(request.url.with_path(f"/images/{name}.png").with_query(None))
+
+
+class _BodyRequest:
+    # what the handlers use of a request, for POSTs with the parameters in the body
+    def __init__(self, url, query: dict) -> None:
+        self.url = url
+        self.query = query
+
+
+HANDLERS = {
+    "pastebin": lambda request, config: {
+        "code": "abc123", "url": "https://paste.fake/abc123", "raw": "https://paste.fake/raw/abc123",
+        "text": request.query.get("text", ""),
+    },
+    "imgur": lambda request, config: {"code": "aBcDeF", "type": "png", "url": _image_url(request, "imgur")},
+    "ordinal": lambda request, config: local.ordinal(int(request.query.get("num", 0))),
+    "userstatus": _user,
+    "inviteinfo": _invite,
+    "templateinfo": _template,
+    "emojify": lambda request, config: local.emojify(request.query.get("text", "")),
+    "parsems": lambda request, config: local.parsems(int(request.query.get("ms", 0))),
+    "translate": lambda request, config: {
+        "text": request.query.get("text", ""), "translated": request.query.get("text", "")[::-1] + _padding(config),
+        "translatedTo": request.query.get("to", "en"),
+    },
+    "youtube/searchvideo": lambda request, config: {
+        "title": request.query.get("query", ""), "description": _padding(config),
+        "url": "https://youtube.com/watch?v=dQw4w9WgXcQ", "channel_id": "UCuAXFkgsw1L7xaCfnd5JJOw",
+    },
+    "safenote": lambda request, config: {"url": "https://safenote.fake/n/abc123"},
+    "encode": lambda request, config: local.encode(request.query.get("text", "")),
+    "decode": lambda request, config: local.decode(request.query.get("text", "")),
+    "reverse": lambda request, config: local.reverse(request.query.get("text", "")),
+    "image-search": lambda request, config: {"image": _image_url(request, request.query.get("query", "image"))},
+    "randomemoji": lambda request, config: {
+        "title": "fake_emoji", "category": request.query.get("category", "1"),
+        "image": _image_url(request, f"emoji{config.random.randint(1, 50)}"),
+    },
+    "topgg/hasvoted": lambda request, config: {"voted": "true" if int(request.query.get("user", 0)) % 2 else "false"},
+}
+
+
+def make_app(config: FakeConfig = None) -> web.Application:
+    config = config or FakeConfig()
+    app = web.Application()
+    app["config"] = config
+    app["requests"] = {}
+
+    async def delay():
+        seconds = config.latency + (config.random.uniform(-config.jitter, config.jitter) if config.jitter else 0.0)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    async def api(request):
+        endpoint = request.match_info["endpoint"]
+        app["requests"][endpoint] = app["requests"].get(endpoint, 0) + 1
+        handler = HANDLERS.get(endpoint)
+        if handler is None:
+            return web.json_response({"status": 404, "error": "Unknown endpoint"}, status = 404)
+
+        if request.method == "POST":
+            # parameters in a JSON body, the handlers read them from the query like for GET
+            body = await request.read()
+            if body[:2] == b"\x1f\x8b":
+                body = gzip.decompress(body)
+            params = {key: str(value) for key, value in json.loads(body or b"{}").items()}
+            request = _BodyRequest(request.url, params)
+            app["requests"]["post"] = app["requests"].get("post", 0) + 1
+
+        await delay()
+        if config.ratelimit_rate and config.random.random() < config.ratelimit_rate:
+            return web.json_response(
+                {"status": 429, "error": "You are being rate limited"}, status = 429,
+                headers = {"Retry-After": str(config.retry_after)},
+            )
+        if config.error_rate and config.random.random() < config.error_rate:
+            return web.json_response({"status": 500, "error": "Internal Server Error"}, status = 500)
+
+        result = handler(request, config)
+        if isinstance(result, web.StreamResponse):
+            return result
+        result["status"] = 200
+        return web.json_response(result)
+
+    async def image(request):
+        app["requests"]["images"] = app["requests"].get("images", 0) + 1
+        await delay()
+        headers = {"ETag": f'"{config.image_size}"', "Last-Modified": "Tue, 09 Mar 2021 00:00:00 GMT"}
+        if request.headers.get("If-None-Match") == headers["ETag"]:
+            app["requests"]["images_not_modified"] = app["requests"].get("images_not_modified", 0) + 1
+            return web.Response(status = 304, headers = headers)
+        return web.Response(
+            body = b"\x89PNG" + b"\x00" * max(config.image_size - 4, 0), content_type = "image/png", headers = headers
+        )
+
+    async def head(request):
+        return web.Response()
+
+    app.router.add_get("/images/{name}.png", image)
+    app.router.add_route("HEAD", "/", head)
+    app.router.add_get("/{endpoint:.+}", api)
+    app.router.add_post("/{endpoint:.+}", api)
+    return app
+
+
+async def start(host: str = "127.0.0.1", port: int = 0, config: FakeConfig = None):
+    # Returns the runner (call cleanup() to stop) and the base URL to pass as Client(api_url = ...).
+    runner = web.AppRunner(make_app(config), access_log = None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8080)
+    parser.add_argument("--latency", type = float, default = 0.0, help = "seconds added to every response")
+    parser.add_argument("--jitter", type = float, default = 0.0, help = "random +- seconds on top of latency")
+    parser.add_argument("--error-rate", type = float, default = 0.0, help = "chance of a 500 response")
+    parser.add_argument("--ratelimit-rate", type = float, default = 0.0, help = "chance of a 429 response")
+    parser.add_argument("--retry-after", type = float, default = 1.0)
+    parser.add_argument("--payload-size", type = int, default = 0, help = "extra characters in text fields")
+    parser.add_argument("--image-size", type = int, default = 64 * 1024)
+    parser.add_argument("--seed", type = int)
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        latency = args.latency, jitter = args.jitter, error_rate = args.error_rate,
+        ratelimit_rate = args.ratelimit_rate, retry_after = args.retry_after, payload_size = args.payload_size,
+        image_size = args.image_size, seed = args.seed,
+    )
+    web.run_app(make_app(config), host = args.host, port = args.port, access_log = None)
+
+
+if __name__ == "__main__":
+    main()
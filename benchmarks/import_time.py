@@ -0,0 +1,98 @@
+"""Import time of normal_api, measured with python -X importtime in fresh processes.
+
+Fails (exit code 1) when the median time of `import normal_api` is over --budget milliseconds, or when aiohttp
+gets imported before the first request is made.
+
+    python benchmarks/import_time.py --runs 20 --budget 20
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parent.parent)
+
+# name: (statement, may import aiohttp)
+SCENARIOS = {
+    "import": ("import normal_api", False),
+    "client": ("import normal_api; normal_api.Client()", False),
+    "local": ("import normal_api; normal_api.local.ordinal(1)", False),
+    "everything": ("import normal_api; [getattr(normal_api, name) for name in normal_api.__all__]", False),
+    "aiohttp": ("import aiohttp", True),
+}
+
+
+def _top_level(stderr):
+    # {module: cumulative microseconds} of the imports that weren't nested in another one
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == "imported package" or name.startswith("  "):
+            continue
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            continue
+    return times
+
+
+def _measure(statement, startup):
+    # the time of everything the statement imported, without what the interpreter imported at startup
+    check = f"{statement}; import sys; print('aiohttp' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check], cwd = ROOT, capture_output = True, text = True, check = True
+    )
+    times = _top_level(result.stderr)
+    total = sum(micros for name, micros in times.items() if name not in startup and name != "sys")
+    return total / 1000, result.stdout.strip() == "True"
+
+
+def run(runs):
+    startup = set(_top_level(subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"], capture_output = True, text = True, check = True
+    ).stderr))
+
+    results = {}
+    for name, (statement, _) in SCENARIOS.items():
+        times = []
+        imported_aiohttp = False
+        for _ in range(runs):
+            milliseconds, aiohttp = _measure(statement, startup)
+            times.append(milliseconds)
+            imported_aiohttp = imported_aiohttp or aiohttp
+        results[name] = {
+            "statement": statement,
+            "median_ms": round(statistics.median(times), 2),
+            "min_ms": round(min(times), 2),
+            "imports_aiohttp": imported_aiohttp,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--runs", type = int, default = 10)
+    parser.add_argument("--budget", type = float, default = 20.0, help = "milliseconds `import normal_api` may take")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    print(json.dumps(results, indent = 2))
+
+    failures = []
+    if results["import"]["median_ms"] > args.budget:
+        failures.append(f"import normal_api took {results['import']['median_ms']} ms, the budget is {args.budget} ms")
+    for name, (_, may_import_aiohttp) in SCENARIOS.items():
+        if results[name]["imports_aiohttp"] and not may_import_aiohttp:
+            failures.append(f"{results[name]['statement']!r} imported aiohttp")
+    for failure in failures:
+        print(failure, file = sys.stderr)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
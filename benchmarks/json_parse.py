@@ -0,0 +1,57 @@
+"""CPU cost of parsing one API response in Client._send.
+
+"before" mirrors the old path: ``response.json()`` (decode to str, stdlib json.loads)
+followed by ``response.text()`` (decode again) when the payload has no "error" key.
+"after" is the new path: the raw bytes go straight to the decoder, once.
+
+    python benchmarks/json_parse.py [iterations]
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from normal_api import utils  # noqa: E402
+
+BODY = json.dumps({
+    "code": "yCzcfju", "url": "https://discord.gg/yCzcfju", "inviter_tag": "Soheab_#6240",
+    "inviter_id": "150665783268212746", "guild_name": "Soheab's Server", "guild_members": "420",
+    "guild_id": "681882711945641997", "guild_description": "undefined",
+    "guild_features": "COMMUNITY,NEWS,WELCOME_SCREEN_ENABLED", "channel_name": "welcome",
+    "channel_id": "681882712390369290", "status": 200,
+}).encode()
+
+
+def before(body = BODY):
+    data = json.loads(body.decode("utf-8"))
+    status = int(data.get("status")) if data.get("status") else None
+    text = data.get("error") or body.decode("utf-8")
+    return data, status, text
+
+
+def make_after(loads):
+    def after(body = BODY):
+        data = loads(body)
+        status = int(data.get("status")) if data.get("status") else None
+        return data, status
+
+    return after
+
+
+def main(iterations = 200000):
+    cases = [("before (json + text)", before), ("after (json)", make_after(utils._stdlib_from_json))]
+    if utils.ujson is not None:
+        cases.append(("after (ujson)", make_after(utils.ujson.loads)))
+    if utils.orjson is not None:
+        cases.append(("after (orjson)", make_after(utils.orjson.loads)))
+
+    print(f"{len(BODY)} byte payload, {iterations} iterations, default decoder: {utils.JSON_DECODER}")
+    for name, function in cases:
+        seconds = min(timeit.repeat(function, number = iterations, repeat = 3))
+        print(f"{name:<22}{seconds / iterations * 1e6:>8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
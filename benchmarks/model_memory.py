@@ -0,0 +1,153 @@
+"""Per-object memory of the models in normal_api.classes.
+
+Compares the slotted, lazily parsed models with the eagerly parsed, __dict__ based
+models they replaced (copied below as ``Eager*``). Payload dicts are created before
+measuring, so only the model objects themselves are counted.
+
+    python benchmarks/model_memory.py [count]
+"""
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from normal_api.classes import Invite, Template, User, _UNDEFINED_OR_NULL  # noqa: E402
+
+INVITE = {
+    "code": "yCzcfju", "url": "https://discord.gg/yCzcfju", "inviter_tag": "Soheab_#6240",
+    "inviter_id": "150665783268212746", "guild_name": "Soheab's Server", "guild_members": "420",
+    "guild_id": "681882711945641997", "guild_description": "undefined",
+    "guild_features": "COMMUNITY,NEWS,WELCOME_SCREEN_ENABLED", "channel_name": "welcome",
+    "channel_id": "681882712390369290",
+}
+TEMPLATE = {
+    "code": "hgM48av5Q69A", "url": "https://discord.new/hgM48av5Q69A", "description": "A template",
+    "usage_count": "1234", "roles": "Admin,Mod,Member", "channels": "general,memes,rules",
+    "creator_tag": "Soheab_#6240", "creator_id": "150665783268212746", "guild_name": "Template",
+    "guild_id": "681882711945641997", "guild_region": "europe", "guild_verification_level": "1",
+}
+USER = {
+    "username": "Soheab_", "id": "150665783268212746", "discrim": "6240", "tag": "Soheab_#6240",
+    "user_status": "dnd", "status_type": "PLAYING", "custom_status": "null", "custom_status_emoji": "null",
+}
+
+
+class EagerInvite:
+    def __init__(self, data):
+        self._data = data
+        self.code = data.get("code")
+        self.url = data.get("url")
+        self.inviter = EagerInvite.Inviter(data)
+        self.guild = EagerInvite.Guild(data)
+        self.channel = EagerInvite.Channel(data)
+
+    class Inviter:
+        def __init__(self, data):
+            self._data = data
+            self._tag = data.get("inviter_tag")
+            self.__split_tag = self._tag.split("#")
+            self.username = self.__split_tag[0]
+            self.discriminator = self.__split_tag[1]
+            self.id = int(data.get("inviter_id"))
+
+    class Guild:
+        def __init__(self, data):
+            self._data = data
+            self.name = data.get("guild_name")
+            self.members = _UNDEFINED_OR_NULL(data.get("guild_members", 0), True)
+            self.id = int(data.get("guild_id"))
+            self.description = _UNDEFINED_OR_NULL(data.get("guild_description"))
+
+    class Channel:
+        def __init__(self, data):
+            self._data = data
+            self.name = data.get("channel_name")
+            self.id = int(data.get("channel_id"))
+
+
+class EagerTemplate:
+    def __init__(self, data):
+        self._data = data
+        self.code = data.get("code")
+        self.url = data.get("url")
+        self.description = _UNDEFINED_OR_NULL(data.get("description"))
+        self.usage_count = int(data.get("usage_count"))
+        self.creator = EagerTemplate.Creator(data)
+        self.guild = EagerTemplate.Guild(data)
+
+    class Creator:
+        def __init__(self, data):
+            self._data = data
+            self._creator_tag = data.get("creator_tag")
+            self.__split_creator_tag = self._creator_tag.split("#")
+            self.username = self.__split_creator_tag[0]
+            self.id = int(data.get("creator_id"))
+            self.discriminator = self.__split_creator_tag[1]
+
+    class Guild:
+        def __init__(self, data):
+            self._data = data
+            self.name = data.get("guild_name")
+            self.id = int(data.get("guild_id"))
+            self.region = data.get("guild_region")
+            self.verification_level = int(data.get("guild_verification_level"))
+
+
+class EagerUser:
+    def __init__(self, data):
+        self._data = data
+        self.username = data.get("username")
+        self.status = _UNDEFINED_OR_NULL(data.get("user_status", None))
+        self.activity = EagerUser.Activity(data)
+
+    class Activity:
+        def __init__(self, data):
+            self.type = _UNDEFINED_OR_NULL(data.get("status_type"))
+            self.text = _UNDEFINED_OR_NULL(data.get("custom_status"))
+            self.emoji = _UNDEFINED_OR_NULL(data.get("custom_status_emoji"))
+
+
+def touch_invite(invite):
+    return invite.inviter, invite.guild, invite.channel, invite.guild.features
+
+
+def touch_template(template):
+    return template.creator, template.guild, template.roles, template.channels
+
+
+def touch_user(user):
+    return user.activity
+
+
+def measure(cls, payload, count, touch = None):
+    payloads = [dict(payload) for _ in range(count)]
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = [cls(data) for data in payloads]
+    if touch is not None:
+        for obj in objects:
+            touch(obj)
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del objects
+    return used / count
+
+
+def main(count = 20000):
+    rows = [
+        ("Invite", EagerInvite, Invite, INVITE, touch_invite),
+        ("Template", EagerTemplate, Template, TEMPLATE, touch_template),
+        ("User", EagerUser, User, USER, touch_user),
+    ]
+    print(f"bytes per object, {count} objects each")
+    print(f"{'model':<10}{'before':>10}{'after':>10}{'after (all fields read)':>26}")
+    for name, eager, lazy, payload, touch in rows:
+        before = measure(eager, payload, count)
+        after = measure(lazy, payload, count)
+        touched = measure(lazy, payload, count, touch)
+        print(f"{name:<10}{before:>10.0f}{after:>10.0f}{touched:>26.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,182 @@
+"""Throughput and latency benchmarks of the client against the local fake server.
+
+The server runs in a separate process so it doesn't compete with the client for the event loop.
+
+    python benchmarks/run.py --requests 2000 --concurrency 50 --output results.json
+    python benchmarks/run.py --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import normal_api  # noqa: E402
+from fake_server import FakeConfig, start  # noqa: E402
+
+
+def _serve(port, latency, image_size, ready):
+    async def serve():
+        runner, _ = await start(port = port, config = FakeConfig(latency = latency, image_size = image_size))
+        ready.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(serve())
+
+
+async def _timed(function, latencies):
+    started = time.perf_counter()
+    await function()
+    latencies.append(time.perf_counter() - started)
+
+
+async def _run_calls(make_call, count, concurrency):
+    latencies = []
+    calls = iter(range(count))
+
+    async def worker():
+        for index in calls:
+            await _timed(make_call(index), latencies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _summary(count, elapsed, latencies):
+    result = {"requests": count, "seconds": round(elapsed, 4), "requests_per_second": round(count / elapsed, 1)}
+    if latencies:
+        result["p50_ms"] = round(_percentile(latencies, 50) * 1000, 3)
+        result["p99_ms"] = round(_percentile(latencies, 99) * 1000, 3)
+    return result
+
+
+def scenarios(client):
+    async def read_emoji(_):
+        async with await client.random_emoji() as emoji:
+            await emoji.image.read(bytesio = False)
+
+    async def stream_emoji(_):
+        emoji = await client.random_emoji()
+        async for _chunk in emoji.image.iter_chunks():
+            pass
+
+    return {
+        "single/ordinal": lambda index: lambda: client.ordinal(index),
+        "single/invite_info": lambda index: lambda: client.invite_info(f"code{index}"),
+        "single/user_status": lambda index: lambda: client.user_status(index),
+        "images/random_emoji_read": lambda index: lambda: read_emoji(index),
+        "images/random_emoji_stream": lambda index: lambda: stream_emoji(index),
+    }
+
+
+async def run(url, count, concurrency, allocation_requests):
+    results = {}
+    client = normal_api.Client(api_url = url, http_config = normal_api.HTTPConfig(limit = concurrency))
+    try:
+        await client.ordinal(1)  # open the session and a connection
+        for name, make_call in scenarios(client).items():
+            elapsed, latencies = await _run_calls(make_call, count, concurrency)
+            results[name] = _summary(count, elapsed, latencies)
+
+            # a second, smaller pass with tracemalloc on, it slows everything down
+            tracemalloc.start()
+            await _run_calls(make_call, allocation_requests, concurrency)
+            results[name]["traced_peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.stop()
+
+        codes = [f"batch{index}" for index in range(count)]
+        started = time.perf_counter()
+        async for _code, _invite in client.invite_info_many(codes, concurrency = concurrency):
+            pass
+        results["batch/invite_info_many"] = _summary(count, time.perf_counter() - started, [])
+    finally:
+        await client.close()
+
+    results["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results
+
+
+def compare(old, new):
+    print(f"{'scenario':<30}{'req/s':>12}{'change':>10}{'p99 ms':>12}{'change':>10}")
+    for name, result in new["results"].items():
+        if not isinstance(result, dict):
+            continue
+        before = old["results"].get(name, {})
+
+        def change(key):
+            if not before.get(key) or key not in result:
+                return "-"
+            return f"{(result[key] - before[key]) / before[key] * 100:+.1f}%"
+
+        print(f"{name:<30}{result['requests_per_second']:>12}{change('requests_per_second'):>10}"
+              f"{result.get('p99_ms', '-'):>12}{change('p99_ms'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--requests", type = int, default = 2000, help = "requests per scenario")
+    parser.add_argument("--concurrency", type = int, default = 50)
+    parser.add_argument("--allocation-requests", type = int, default = 200)
+    parser.add_argument("--latency", type = float, default = 0.0, help = "latency of the fake server in seconds")
+    parser.add_argument("--image-size", type = int, default = 64 * 1024)
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("--output", help = "save the results as JSON")
+    parser.add_argument("--compare", help = "JSON file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(
+        target = _serve, args = (args.port, args.latency, args.image_size, ready), daemon = True
+    )
+    server.start()
+    try:
+        if not ready.wait(10):
+            raise SystemExit("fake server didn't start")
+        url = f"http://127.0.0.1:{args.port}/"
+        results = asyncio.run(run(url, args.requests, args.concurrency, args.allocation_requests))
+    finally:
+        server.terminate()
+        server.join()
+
+    report = {
+        "meta": {
+            "normal_api": normal_api.__version__,
+            "aiohttp": aiohttp.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent = 2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent = 2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Checks that worker processes sharing a Coordinator stay within its request budget together.
+
+Starts the fake server, a coordinator and --workers processes that each call invite_info() as fast as they can.
+The server counts the requests it gets, the run fails (exit code 1) if any --window seconds had more than the
+budget allows. --kill-coordinator-after stops the coordinator during the run, the workers then fall back to their
+own share of the budget, which has to hold as well.
+
+    python benchmarks/shared_budget.py --workers 16 --rate 50 --duration 10
+    python benchmarks/shared_budget.py --workers 16 --rate 50 --duration 10 --kill-coordinator-after 4
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import normal_api  # noqa: E402
+from fake_server import FakeConfig, make_app  # noqa: E402
+
+
+def _coordinate(socket, rate, burst):
+    coordinator = normal_api.Coordinator(socket, rate = rate, burst = burst)
+    asyncio.run(coordinator.serve_forever())
+
+
+def _work(url, socket, rate, workers, duration, concurrency, codes, results):
+    async def work():
+        # each worker's share of the budget is what it may use while the coordinator is down
+        limiter = normal_api.SharedRateLimiter(socket, rate / workers, burst = 1, retry_interval = 1.0)
+        cache = normal_api.SharedCache(socket, retry_interval = 1.0)
+        client = normal_api.Client(
+            api_url = url, ratelimiter = limiter, cache = cache, retry_policy = normal_api.RetryPolicy(0)
+        )
+        calls = 0
+        end = time.monotonic() + duration
+
+        async def call():
+            nonlocal calls
+            rng = random.Random()
+            while time.monotonic() < end:
+                await client.invite_info(f"code{rng.randrange(codes)}")
+                calls += 1
+
+        try:
+            await asyncio.gather(*(call() for _ in range(concurrency)))
+        finally:
+            await client.close()
+            await limiter.close()
+            await cache.close()
+        results.put({"calls": calls, "fallbacks": limiter.fallbacks + cache.fallbacks, "cache": cache.stats.to_dict()})
+
+    asyncio.run(work())
+
+
+def _max_in_window(times, window):
+    times = sorted(times)
+    return max((bisect.bisect_left(times, start + window) - index for index, start in enumerate(times)), default = 0)
+
+
+async def run(args):
+    context = multiprocessing.get_context("spawn")
+    socket = os.path.join(tempfile.mkdtemp(), "normal_api.sock")
+    times = []
+
+    async def record(request, response):
+        if not request.path.startswith("/images/"):
+            times.append(time.monotonic())
+
+    app = make_app(FakeConfig(latency = args.latency))
+    app.on_response_prepare.append(record)
+    runner = web.AppRunner(app, access_log = None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+    coordinator = context.Process(target = _coordinate, args = (socket, args.rate, args.burst), daemon = True)
+    coordinator.start()
+    while not os.path.exists(socket):
+        await asyncio.sleep(0.05)
+
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target = _work,
+            args = (url, socket, args.rate, args.workers, args.duration, args.concurrency, args.codes, results),
+            daemon = True,
+        )
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    loop = asyncio.get_event_loop()
+    started = time.monotonic()
+    if args.kill_coordinator_after is not None:
+        await asyncio.sleep(args.kill_coordinator_after)
+        coordinator.kill()
+    reports = [await loop.run_in_executor(None, results.get) for _ in workers]
+    elapsed = time.monotonic() - started
+    for worker in workers:
+        worker.join()
+    coordinator.kill()
+    await runner.cleanup()
+
+    allowed = int(args.rate * args.window + (args.burst or max(1.0, args.rate)))
+    if args.kill_coordinator_after is not None:
+        # reservations from the coordinator still running out while the workers use their own burst of 1
+        allowed += args.workers
+    highest = _max_in_window(times, args.window)
+    calls = sum(report["calls"] for report in reports)
+    return {
+        "workers": args.workers,
+        "budget_per_second": args.rate,
+        "seconds": round(elapsed, 3),
+        "calls": calls,
+        "server_requests": len(times),
+        "server_requests_per_second": round(len(times) / elapsed, 1),
+        "max_in_window": highest,
+        "allowed_in_window": allowed,
+        "cache_hit_ratio": round(1 - len(times) / calls, 3) if calls else 0.0,
+        "fallbacks": sum(report["fallbacks"] for report in reports),
+        "within_budget": highest <= allowed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--workers", type = int, default = 16)
+    parser.add_argument("--rate", type = float, default = 50.0, help = "requests per second of all workers together")
+    parser.add_argument("--burst", type = float, help = "defaults to one second of --rate")
+    parser.add_argument("--duration", type = float, default = 10.0, help = "seconds each worker keeps calling")
+    parser.add_argument("--concurrency", type = int, default = 8, help = "concurrent calls per worker")
+    parser.add_argument("--codes", type = int, default = 5000, help = "distinct invite codes, fewer means more hits")
+    parser.add_argument("--latency", type = float, default = 0.005, help = "latency of the fake server in seconds")
+    parser.add_argument("--window", type = float, default = 1.0, help = "seconds the budget is checked over")
+    parser.add_argument("--kill-coordinator-after", type = float, help = "seconds until the coordinator is killed")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent = 2))
+    if not result["within_budget"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,80 @@
-from .client import *
+import importlib
+import sys
+from typing import TYPE_CHECKING
 
 __license__ = "MIT"
 __author__ = "Soheab_"
 __version__ = "1.0.0"
+
+# Submodules are only imported when one of their names is first used, so importing normal_api is fast and
+# aiohttp isn't imported before the first request. Names are listed per submodule.
+_EXPORTS = {
+    "cache": (
+        "CacheStats", "BaseCache", "ResponseCache", "SQLiteCache", "StaleWhileRevalidate", "DEFAULT_TTLS",
+        "WRITE_ENDPOINTS", "UNCACHEABLE_ENDPOINTS", "NONDETERMINISTIC_ENDPOINTS", "make_key",
+    ),
+    "circuit": ("CircuitBreaker", "ConcurrencyLimiter", "is_failure"),
+    "classes": (
+        "Image", "Pastebin", "Imgur", "User", "Invite", "Template", "Emojified", "ParsedMS", "Translated",
+        "YoutubeVideo", "RandomEmoji",
+    ),
+    "client": ("Client", "BODY_ENDPOINTS"),
+    "errors": (
+        "NormalAPIException", "BadRequest", "NotFound", "InternalServerError", "Forbidden", "TooManyRequests",
+        "ServiceUnavailable", "CircuitOpen", "DeadlineExceeded", "ImageTooLarge", "HTTPException",
+    ),
+    "http": ("HTTPConfig", "HTTPSession", "wait_until"),
+    "imagecache": ("ImageCache",),
+    "metrics": ("Histogram", "Instrumentation", "RequestTimer"),
+    "ratelimit": ("TokenBucket", "RateLimiter", "RetryPolicy", "DEFAULT_PRIORITIES", "parse_retry_after"),
+    "routing": ("Router",),
+    "shared": ("Coordinator", "SharedRateLimiter", "SharedCache"),
+    "sync": ("SyncClient", "SyncImage"),
+    "utils": ("JSONLoads", "from_json", "split_text"),
+    "votes": ("VoteIndex", "VOTE_WINDOW"),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+_SUBMODULES = frozenset(_EXPORTS) | {"local"}
+
+__all__ = tuple(_MODULES)
+
+if TYPE_CHECKING:
+    from .cache import *
+    from .circuit import *
+    from .classes import *
+    from .client import *
+    from .errors import *
+    from .http import HTTPConfig, HTTPSession, wait_until
+    from .imagecache import *
+    from .metrics import *
+    from .ratelimit import *
+    from .routing import *
+    from .shared import *
+    from .sync import *
+    from .utils import JSONLoads, from_json, split_text
+    from .votes import *
+
+
+def __getattr__(name: str):
+    module = _MODULES.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module(f".{module}", __name__), name)
+        # the next lookup doesn't come through here
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES) | _SUBMODULES)
+
+
+if sys.version_info < (3, 7):
+    # no module __getattr__ (PEP 562) before 3.7, everything is imported up front
+    for _name, _module in _MODULES.items():
+        globals()[_name] = getattr(importlib.import_module(f".{_module}", __name__), _name)
+    from . import local  # noqa: E402
+
+    del _name, _module
@@ -0,0 +1,415 @@
+import asyncio
+import json
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+from .utils import from_json
+
+if TYPE_CHECKING:
+    import sqlite3
+
+__all__ = (
+    "CacheStats",
+    "BaseCache",
+    "ResponseCache",
+    "SQLiteCache",
+    "StaleWhileRevalidate",
+    "DEFAULT_TTLS",
+    "WRITE_ENDPOINTS",
+    "UNCACHEABLE_ENDPOINTS",
+    "NONDETERMINISTIC_ENDPOINTS",
+)
+
+# Endpoints that create something on every call, these are never cached and not safe to repeat.
+WRITE_ENDPOINTS = frozenset({"pastebin", "safenote", "imgur"})
+
+# Reads that are never cached either: a random result every call, or a response for a token.
+UNCACHEABLE_ENDPOINTS = frozenset({"randomemoji", "topgg/hasvoted"})
+
+# Endpoints that may return something else for the same parameters, concurrent calls are never coalesced.
+NONDETERMINISTIC_ENDPOINTS = frozenset({"randomemoji", "image-search"})
+
+# Seconds a response of each endpoint is kept by default.
+DEFAULT_TTLS = {
+    "inviteinfo": 60.0,
+    "templateinfo": 300.0,
+    "userstatus": 15.0,
+    "translate": 3600.0,
+    "youtube/searchvideo": 600.0,
+}
+
+
+def make_key(endpoint: str, params: dict = None) -> str:
+    if not params:
+        return endpoint
+
+    normalized = sorted((str(key), str(value)) for key, value in params.items())
+    return f"{endpoint}?{urlencode(normalized)}"
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "evictions")
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_ratio": self.hit_ratio}
+
+    def __repr__(self):
+        return "<CacheStats hits={0.hits} misses={0.misses} evictions={0.evictions}>".format(self)
+
+
+class BaseCache:
+    # Subclasses implement the storage, this class decides what may be cached and for how long.
+
+    def __init__(self, *, ttls: Dict[str, float] = None, default_ttl: float = None) -> None:
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl: Optional[float] = default_ttl
+        self.stats: CacheStats = CacheStats()
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        if endpoint in WRITE_ENDPOINTS or endpoint in UNCACHEABLE_ENDPOINTS:
+            return None
+
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        # Returns the value and the seconds until it expires, negative if it expired but is kept
+        # for stale-while-revalidate. Backends that don't keep stale entries can leave this as is.
+        value = await self.get(key)
+        if value is None:
+            return None
+        return value, float("inf")
+
+    async def set(self, key: str, value: Any, ttl: float, *, stale: float = 0.0) -> None:
+        # stale: seconds the entry is kept after it expired, only returned by get_entry()
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    async def invalidate(self, endpoint: str, params: dict = None) -> bool:
+        return await self.delete(make_key(endpoint, params))
+
+
+class ResponseCache(BaseCache):
+    def __init__(self, max_size: int = 1024, *, ttls: Dict[str, float] = None, default_ttl: float = None) -> None:
+        super().__init__(ttls = ttls, default_ttl = default_ttl)
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size: int = int(max_size)
+        # key: (expires, kept until, value)
+        self._entries: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self.get_entry(key)
+        if entry is None or entry[1] <= 0:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return entry[0]
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        now = time.monotonic()
+        expires, kept_until, value = entry
+        if kept_until <= now:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value, expires - now
+
+    async def set(self, key: str, value: Any, ttl: float, *, stale: float = 0.0) -> None:
+        expires = time.monotonic() + ttl
+        self._entries[key] = (expires, expires + stale, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last = False)
+            self.stats.evictions += 1
+
+    async def delete(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteCache(BaseCache):
+    # Stored in a SQLite database so entries survive restarts and are shared by every process using the same file.
+    # Values are zlib compressed JSON. Hit counts and access times are kept in memory and written in batches,
+    # so reads don't have to lock the database.
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        *,
+        max_entries: int = 100000,
+        max_bytes: int = None,
+        memory_size: int = 0,
+        purge_interval: int = 64,
+        ttls: Dict[str, float] = None,
+        default_ttl: float = None,
+        compression_level: int = 6,
+    ) -> None:
+        super().__init__(ttls = ttls, default_ttl = default_ttl)
+        self.path: str = str(path)
+        self.max_entries: int = max_entries
+        self.max_bytes: Optional[int] = max_bytes
+        self.purge_interval: int = purge_interval
+        self.compression_level: int = compression_level
+        self._memory: Optional[ResponseCache] = ResponseCache(memory_size, ttls = {}) if memory_size else None
+        self._executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "normal_api-sqlite")
+        self._connection: Optional["sqlite3.Connection"] = None
+        self._accessed: Dict[str, float] = {}
+        self._hits: Dict[str, int] = {}
+        self._sets = 0
+
+    def _connect(self) -> "sqlite3.Connection":
+        if self._connection is None:
+            # imported here, most processes never use it
+            import sqlite3
+
+            connection = sqlite3.connect(self.path, timeout = 30, check_same_thread = False, isolation_level = None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, kept_until REAL NOT NULL, "
+                "size INTEGER NOT NULL, hits INTEGER NOT NULL DEFAULT 0, accessed REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_kept_until ON responses (kept_until)")
+            self._connection = connection
+        return self._connection
+
+    async def _run(self, function, *args):
+        return await asyncio.get_event_loop().run_in_executor(self._executor, function, *args)
+
+    def _dumps(self, value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, separators = (",", ":")).encode("utf-8"), self.compression_level)
+
+    @staticmethod
+    def _loads(blob: bytes) -> Any:
+        return from_json(zlib.decompress(blob))
+
+    def _get(self, key: str) -> Optional[Tuple[bytes, float, float]]:
+        return self._connect().execute(
+            "SELECT value, expires, kept_until FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self.get_entry(key)
+        if entry is None or entry[1] <= 0:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return entry[0]
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        if self._memory is not None:
+            entry = await self._memory.get_entry(key)
+            if entry is not None:
+                self._touch(key)
+                if len(self._accessed) >= self.purge_interval * 16:
+                    await self._run(self._flush, self._take_access_rows())
+                return entry
+
+        row = await self._run(self._get, key)
+        now = time.time()
+        if row is None or row[2] <= now:
+            return None
+
+        self._touch(key)
+        blob, expires, kept_until = row
+        value = self._loads(blob)
+        if self._memory is not None:
+            await self._memory.set(key, value, expires - now, stale = kept_until - expires)
+        return value, expires - now
+
+    def _touch(self, key: str) -> None:
+        self._accessed[key] = time.time()
+        self._hits[key] = self._hits.get(key, 0) + 1
+
+    def _take_access_rows(self) -> List[Tuple[int, float, str]]:
+        # called on the event loop, the rows are then written by the executor's thread
+        rows = [(self._hits.get(key, 0), accessed, key) for key, accessed in self._accessed.items()]
+        self._accessed = {}
+        self._hits = {}
+        return rows
+
+    def _set(self, key: str, blob: bytes, expires: float, stale: float, rows: Optional[list]) -> int:
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires, kept_until, size, hits, accessed) "
+            "VALUES (?, ?, ?, ?, ?, COALESCE((SELECT hits FROM responses WHERE key = ?), 0), ?)",
+            (key, blob, expires, expires + stale, len(blob), key, time.time()),
+        )
+        return self._purge(rows) if rows is not None else 0
+
+    async def set(self, key: str, value: Any, ttl: float, *, stale: float = 0.0) -> None:
+        self._sets += 1
+        rows = self._take_access_rows() if self._sets % self.purge_interval == 0 else None
+        evicted = await self._run(self._set, key, self._dumps(value), time.time() + ttl, stale, rows)
+        self.stats.evictions += evicted
+        if self._memory is not None:
+            await self._memory.set(key, value, ttl, stale = stale)
+
+    def _flush(self, rows: List[Tuple[int, float, str]]) -> None:
+        if not rows:
+            return
+
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "UPDATE responses SET hits = hits + ?, accessed = MAX(accessed, ?) WHERE key = ?", rows
+            )
+
+    def _purge(self, rows: List[Tuple[int, float, str]]) -> int:
+        # expired entries first, then the least recently used ones until the limits are met
+        self._flush(rows)
+        connection = self._connect()
+        removed = connection.execute("DELETE FROM responses WHERE kept_until <= ?", (time.time(),)).rowcount
+        if self.max_entries:
+            removed += connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed DESC "
+                "LIMIT -1 OFFSET ?)", (self.max_entries,)
+            ).rowcount
+        if self.max_bytes:
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                rows = connection.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+                delete = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    delete.append((key,))
+                    total -= size
+                connection.executemany("DELETE FROM responses WHERE key = ?", delete)
+                removed += len(delete)
+        return removed
+
+    async def purge(self) -> int:
+        evicted = await self._run(self._purge, self._take_access_rows())
+        self.stats.evictions += evicted
+        return evicted
+
+    def _delete(self, key: str) -> bool:
+        return self._connect().execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount > 0
+
+    async def delete(self, key: str) -> bool:
+        if self._memory is not None:
+            await self._memory.delete(key)
+        return await self._run(self._delete, key)
+
+    def _clear(self) -> None:
+        self._connect().execute("DELETE FROM responses")
+
+    async def clear(self) -> None:
+        if self._memory is not None:
+            await self._memory.clear()
+        self._take_access_rows()
+        await self._run(self._clear)
+
+    def _hottest(self, limit: int, rows: List[Tuple[int, float, str]]) -> List[Tuple[str, bytes, float, float]]:
+        self._flush(rows)
+        return self._connect().execute(
+            "SELECT key, value, expires, kept_until FROM responses WHERE kept_until > ? "
+            "ORDER BY hits DESC, accessed DESC LIMIT ?",
+            (time.time(), limit),
+        ).fetchall()
+
+    async def warm(self, limit: int = None) -> int:
+        # Loads the most used entries into the memory tier, call this at startup.
+        if self._memory is None:
+            return 0
+
+        rows = await self._run(self._hottest, limit or self._memory.max_size, self._take_access_rows())
+        now = time.time()
+        for key, blob, expires, kept_until in reversed(rows):
+            await self._memory.set(key, self._loads(blob), expires - now, stale = kept_until - expires)
+        return len(rows)
+
+    def _close(self, rows: List[Tuple[int, float, str]]) -> None:
+        if self._connection is not None:
+            self._flush(rows)
+            self._connection.close()
+            self._connection = None
+
+    async def close(self) -> None:
+        await self._run(self._close, self._take_access_rows())
+        self._executor.shutdown(wait = False)
+
+
+class StaleWhileRevalidate:
+    # Expired entries of these endpoints are returned right away while they're refreshed in the background.
+    # Entries that are requested shortly before they expire are refreshed ahead of time.
+
+    def __init__(
+        self,
+        endpoints: Tuple[str, ...] = ("userstatus", "inviteinfo"),
+        *,
+        max_stale: float = 30.0,
+        refresh_ahead: float = 0.8,
+        max_pending: int = 100,
+    ) -> None:
+        self.endpoints: frozenset = frozenset(endpoints)
+        self.max_stale: float = max_stale
+        self.refresh_ahead: Optional[float] = refresh_ahead
+        self.max_pending: int = max_pending
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.stale_hits: int = 0
+        self.refreshes: int = 0
+        self.dropped: int = 0
+
+    def stale_for(self, endpoint: str) -> float:
+        return self.max_stale if endpoint in self.endpoints else 0.0
+
+    def should_refresh(self, endpoint: str, remaining: float, ttl: float) -> bool:
+        if remaining <= 0:
+            return True
+        # refresh_ahead is the part of the ttl after which a hit starts a refresh
+        return self.refresh_ahead is not None and remaining < ttl * (1 - self.refresh_ahead)
+
+    def stats(self) -> dict:
+        return {
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "dropped": self.dropped,
+            "pending": len(self.pending),
+        }
@@ -0,0 +1,297 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+from .errors import CircuitOpen, DeadlineExceeded, HTTPException, InternalServerError, ServiceUnavailable
+from .http import is_connection_error
+
+__all__ = ("CircuitBreaker", "ConcurrencyLimiter")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_failure(error: Optional[BaseException]) -> bool:
+    # Errors that mean the endpoint itself is in trouble. 4xx responses (and 429s, those are handled by the
+    # rate limiter) still show the endpoint is answering, so they don't count. Neither does running out of a
+    # deadline the caller chose.
+    if error is None or isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (InternalServerError, ServiceUnavailable)):
+        return True
+    if isinstance(error, HTTPException):
+        return error.status >= 500
+    return isinstance(error, asyncio.TimeoutError) or is_connection_error(error)
+
+
+class _Circuit:
+    __slots__ = ("state", "failures", "opened_at", "probes", "opened", "rejected")
+
+    def __init__(self) -> None:
+        self.state: str = CLOSED
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.probes: int = 0
+        self.opened: int = 0
+        self.rejected: int = 0
+
+
+class CircuitBreaker:
+    # After failure_threshold failures in a row an endpoint's circuit opens and requests to it raise CircuitOpen
+    # without being sent. After recovery_time a few probe requests are let through (half open), the circuit
+    # closes again if they succeed and reopens if one fails.
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        *,
+        recovery_time: float = 30.0,
+        half_open_requests: int = 1,
+        endpoints: Iterable[str] = None,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+
+        self.failure_threshold: int = failure_threshold
+        self.recovery_time: float = recovery_time
+        self.half_open_requests: int = max(1, half_open_requests)
+        # None means every endpoint
+        self.endpoints: Optional[frozenset] = frozenset(endpoints) if endpoints is not None else None
+        self._circuits: Dict[str, _Circuit] = {}
+
+    def __repr__(self):
+        return "<CircuitBreaker failure_threshold={0.failure_threshold} " \
+               "recovery_time={0.recovery_time}>".format(self)
+
+    def _circuit(self, endpoint: str) -> Optional[_Circuit]:
+        if self.endpoints is not None and endpoint not in self.endpoints:
+            return None
+
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit()
+        return circuit
+
+    def state(self, endpoint: str) -> str:
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            return CLOSED
+        if circuit.state == OPEN and time.monotonic() >= circuit.opened_at + self.recovery_time:
+            return HALF_OPEN
+        return circuit.state
+
+    def check(self, endpoint: str) -> None:
+        # Called before every attempt, raises CircuitOpen if the request shouldn't be sent.
+        circuit = self._circuit(endpoint)
+        if circuit is None or circuit.state == CLOSED:
+            return
+
+        if circuit.state == OPEN:
+            retry_after = circuit.opened_at + self.recovery_time - time.monotonic()
+            if retry_after > 0:
+                circuit.rejected += 1
+                raise CircuitOpen(endpoint, retry_after = retry_after)
+            circuit.state = HALF_OPEN
+            circuit.probes = 0
+
+        if circuit.probes >= self.half_open_requests:
+            circuit.rejected += 1
+            raise CircuitOpen(endpoint, retry_after = None)
+        circuit.probes += 1
+
+    def record(self, endpoint: str, error: BaseException = None) -> None:
+        if isinstance(error, DeadlineExceeded):
+            # cut short by the caller, like a cancelled attempt it says nothing either way
+            self.cancelled(endpoint)
+            return
+
+        circuit = self._circuit(endpoint)
+        if circuit is None:
+            return
+
+        if not is_failure(error):
+            circuit.failures = 0
+            if circuit.state == HALF_OPEN:
+                circuit.state = CLOSED
+            return
+
+        circuit.failures += 1
+        if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+            self.trip(endpoint)
+
+    def cancelled(self, endpoint: str) -> None:
+        # the attempt never finished, give its half open probe back
+        circuit = self._circuits.get(endpoint)
+        if circuit is not None and circuit.state == HALF_OPEN and circuit.probes > 0:
+            circuit.probes -= 1
+
+    def trip(self, endpoint: str) -> None:
+        circuit = self._circuit(endpoint)
+        if circuit is None:
+            return
+
+        if circuit.state != OPEN:
+            circuit.opened += 1
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.probes = 0
+
+    def reset(self, endpoint: str = None) -> None:
+        # endpoint None closes every circuit
+        if endpoint is None:
+            self._circuits.clear()
+        else:
+            self._circuits.pop(endpoint, None)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            endpoint: {
+                "state": self.state(endpoint),
+                "failures": circuit.failures,
+                "opened": circuit.opened,
+                "rejected": circuit.rejected,
+                "retry_after": round(max(0.0, circuit.opened_at + self.recovery_time - now), 3)
+                if circuit.state == OPEN else None,
+            }
+            for endpoint, circuit in self._circuits.items()
+        }
+
+
+class _Limit:
+    __slots__ = ("limit", "inflight", "waiters", "baseline", "latency", "decreased_at", "requests", "decreases")
+
+    def __init__(self, limit: float) -> None:
+        self.limit: float = limit
+        self.inflight: int = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.baseline: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.decreased_at: float = 0.0
+        self.requests: int = 0
+        self.decreases: int = 0
+
+
+class ConcurrencyLimiter:
+    # Limits how many requests can run at once per endpoint and adapts the limit to the endpoint's latency (AIMD):
+    # every request that finishes in time raises the limit by about one per round trip, a failure or a latency
+    # above tolerance times the endpoint's baseline multiplies it by backoff. A slow endpoint then can't take
+    # all the connections in the pool.
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        backoff: float = 0.75,
+        tolerance: float = 2.0,
+        max_latency: float = None,
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+
+        self.initial_limit: int = initial_limit
+        self.min_limit: int = min_limit
+        self.max_limit: int = max_limit
+        self.backoff: float = backoff
+        self.tolerance: float = tolerance
+        self.max_latency: Optional[float] = max_latency
+        self._limits: Dict[str, _Limit] = {}
+
+    def __repr__(self):
+        return "<ConcurrencyLimiter initial_limit={0.initial_limit} min_limit={0.min_limit} " \
+               "max_limit={0.max_limit}>".format(self)
+
+    def _state(self, endpoint: str) -> _Limit:
+        state = self._limits.get(endpoint)
+        if state is None:
+            state = self._limits[endpoint] = _Limit(float(self.initial_limit))
+        return state
+
+    def limit(self, endpoint: str) -> int:
+        state = self._limits.get(endpoint)
+        return int(state.limit) if state is not None else self.initial_limit
+
+    async def acquire(self, endpoint: str) -> float:
+        # Returns the start time to pass to release()
+        state = self._state(endpoint)
+        if state.inflight < int(state.limit) and not state.waiters:
+            state.inflight += 1
+            return time.monotonic()
+
+        future = asyncio.get_event_loop().create_future()
+        state.waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over right before the cancel
+                state.inflight -= 1
+                self._wake(state)
+            raise
+        return time.monotonic()
+
+    def _wake(self, state: _Limit) -> None:
+        while state.waiters and state.inflight < int(state.limit):
+            future = state.waiters.popleft()
+            if not future.done():
+                state.inflight += 1
+                future.set_result(None)
+
+    def release(self, endpoint: str, started: float, error: BaseException = None) -> None:
+        state = self._state(endpoint)
+        state.inflight -= 1
+        if isinstance(error, (asyncio.CancelledError, DeadlineExceeded)):
+            # says nothing about the endpoint
+            self._wake(state)
+            return
+
+        now = time.monotonic()
+        latency = now - started
+        state.requests += 1
+        state.latency = latency if state.latency is None else state.latency * 0.9 + latency * 0.1
+
+        failed = is_failure(error)
+        if not failed:
+            # lowest latency seen, slowly moves up so a lasting change is accepted eventually
+            if state.baseline is None or latency < state.baseline:
+                state.baseline = latency
+            else:
+                state.baseline += (latency - state.baseline) * 0.01
+
+        slow = not failed and (
+            latency > state.baseline * self.tolerance or (self.max_latency is not None and latency > self.max_latency)
+        )
+        if failed or slow:
+            # requests that started before the last decrease already saw it, only back off once per round trip
+            if started >= state.decreased_at:
+                state.limit = max(float(self.min_limit), state.limit * self.backoff)
+                state.decreased_at = now
+                state.decreases += 1
+        elif state.inflight + 1 >= int(state.limit) // 2:
+            # only grow while the limit is actually being used
+            state.limit = min(float(self.max_limit), state.limit + 1 / state.limit)
+
+        self._wake(state)
+
+    def stats(self) -> dict:
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            endpoint: {
+                "limit": int(state.limit),
+                "inflight": state.inflight,
+                "waiting": sum(1 for future in state.waiters if not future.done()),
+                "latency": ms(state.latency),
+                "baseline": ms(state.baseline),
+                "requests": state.requests,
+                "decreases": state.decreases,
+            }
+            for endpoint, state in self._limits.items()
+        }
@@ -1,7 +1,17 @@
+import asyncio
+import os
+import time
+import uuid
 from io import BytesIO
-from typing import Optional, Union
+from os import PathLike
+from typing import TYPE_CHECKING, AsyncIterator, BinaryIO, Optional, Union
 
-from aiohttp import ClientResponse
+from .errors import DeadlineExceeded, ImageTooLarge
+
+if TYPE_CHECKING:
+    from aiohttp import ClientResponse
+
+    from .imagecache import ImageCache
 
 
 def _UNDEFINED_OR_NULL(text: Union[str, int], integer = False):
@@ -11,10 +21,67 @@ def _UNDEFINED_OR_NULL(text: Union[str, int], integer = False):
     return str(text) if not integer else int(text)
 
 
+def _split_list(text: Optional[str]) -> list:
+    text = _UNDEFINED_OR_NULL(text)
+    if text:
+        return text.strip().split(",")
+    return []
+
+
+# source: https://github.com/Rapptz/discord.py/blob/master/discord/utils.py (CachedSlotProperty)
+class _cached_slot_property:
+    # Computes the value the first time it's accessed and stores it in the slot "_cs_<name>".
+    __slots__ = ("function", "name")
+
+    def __init__(self, function) -> None:
+        self.function = function
+        self.name = f"_cs_{function.__name__}"
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            return getattr(instance, self.name)
+        except AttributeError:
+            value = self.function(instance)
+            setattr(instance, self.name, value)
+            return value
+
+
 class Image:
-    def __init__(self, url: str, response: ClientResponse) -> None:
+    __slots__ = (
+        "url", "deadline", "timeout", "_response", "_session", "_body", "_cache", "_streamed", "_until", "_bound", "_lock"
+    )
+
+    def __init__(
+        self,
+        url: str,
+        response: "ClientResponse" = None,
+        *,
+        session = None,
+        deadline: float = None,
+        timeout: float = None,
+        cache: "ImageCache" = None
+    ) -> None:
         self.url: str = url
-        self._response: ClientResponse = response
+        # time.monotonic() time the download has to be done by, set when it was requested by the call that returned it
+        self.deadline: Optional[float] = deadline
+        # seconds a download that starts later gets, lazy images and downloads after the first one
+        self.timeout: Optional[float] = timeout
+        self._response: Optional["ClientResponse"] = response
+        self._session = session
+        self._body: Optional[Union[bytes, bytearray]] = None
+        self._cache = cache
+        # the body of the response was streamed by iter_chunks() and not kept, it can't be read again
+        self._streamed: bool = False
+        # the deadline of the download that is running
+        self._until: Optional[float] = deadline
+        # the deadline only applies to the first read, reads after it or after release() get a new timeout
+        self._bound: bool = deadline is not None
+        # one read at a time, concurrent reads would each request the image. Created when it's first needed,
+        # older Pythons bind locks to the loop they're created on.
+        self._lock: Optional[asyncio.Lock] = None
 
     def __str__(self) -> str:
         return self.url if self.url is not None else ""
@@ -22,21 +89,309 @@ class Image:
     def __repr__(self):
         return "<Image url={0.url}>".format(self)
 
-    async def read(self, bytesio = True) -> Union[bytes, BytesIO]:
-        _bytes = await self._response.read()
+    async def __aenter__(self) -> "Image":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.release()
+
+    @property
+    def size(self) -> Optional[int]:
+        if self._body is not None:
+            return len(self._body)
+        return self._response.content_length if self._response is not None else None
+
+    @property
+    def fetched(self) -> bool:
+        return self._response is not None or self._body is not None
+
+    def _begin(self, timeout: Optional[float]) -> None:
+        # the time a read gets: its own timeout, else the deadline of the call for the download of the call, else a
+        # new one from self.timeout
+        if timeout is not None:
+            self._until = time.monotonic() + timeout
+        elif self._bound and self.deadline is not None:
+            self._until = self.deadline
+            self._bound = False
+        elif self.timeout is not None:
+            self._until = time.monotonic() + self.timeout
+        else:
+            self._until = None
+
+    def _reading(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def fetch(self, *, timeout: float = None) -> "ClientResponse":
+        async with self._reading():
+            self._begin(timeout)
+            return await self._fetch()
+
+    async def _fetch(self) -> "ClientResponse":
+        # The image is only requested the first time it's needed
+        self._drop_streamed()
+        if self._response is None:
+            self._response = await self._request()
+        return self._response
+
+    async def _request(self, headers: dict = None) -> "ClientResponse":
+        if self._session is None:
+            raise RuntimeError("This image has no session to fetch it with")
+        return await self._session.request(self.url, deadline = self._until, headers = headers)
+
+    def _drop_streamed(self) -> None:
+        # a response that iter_chunks() read (or left halfway) without keeping the body, the image is requested again
+        if self._streamed:
+            self._streamed = False
+            if self._response is not None:
+                self._response.close()
+                self._response = None
+
+    async def _load(self) -> None:
+        # With an image cache: takes the body from it, or revalidates it. Otherwise leaves the response open to read.
+        self._drop_streamed()
+        cache = self._cache
+        if cache is None or self._body is not None or self._response is not None:
+            return
+
+        cached = await cache.lookup(self.url)
+        if cached is None:
+            return
+
+        entry, body = cached
+        if entry.fresh:
+            self._body = body
+            return
+
+        response = await self._request(entry.validators())
+        if response.status == 304:
+            response.release()
+            await cache.revalidated(self.url, response.headers)
+            self._body = body
+        else:
+            self._response = response
+
+    async def _store(self, response: "ClientResponse", body: bytes) -> None:
+        if self._cache is not None and response.status == 200:
+            await self._cache.set(self.url, body, response.headers)
+
+    def release(self) -> None:
+        # Returns the connection to the pool. A body that was read stays available,
+        # otherwise the image is requested again when it's needed.
+        self._bound = False
+        if self._response is not None:
+            self._response.release()
+            self._response = None
+
+    def _abort(self, error: BaseException) -> None:
+        # the connection is left halfway through the body, close it instead of returning it to the pool
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        if (
+            isinstance(error, asyncio.TimeoutError) and not isinstance(error, DeadlineExceeded)
+            and self._until is not None and time.monotonic() >= self._until
+        ):
+            raise DeadlineExceeded() from error
+        raise error
+
+    def _check_size(self, size: Optional[int], max_size: Optional[int]) -> None:
+        if max_size is not None and size is not None and size > max_size:
+            if self._response is not None:
+                self._response.close()
+                self._response = None
+            raise ImageTooLarge(self.url, size, max_size)
+
+    async def _stream(self, response: "ClientResponse", chunk_size: int, max_size: Optional[int]) -> AsyncIterator[bytes]:
+        received = 0
+        try:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                received += len(chunk)
+                # Content-Length can be missing or wrong, so also count what is actually received
+                self._check_size(received, max_size)
+                yield chunk
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            self._abort(exc)
+
+    async def iter_chunks(
+        self, chunk_size: int = 65536, *, max_size: int = None, timeout: float = None
+    ) -> AsyncIterator[bytes]:
+        async with self._reading():
+            self._begin(timeout)
+            async for chunk in self._chunks(chunk_size, max_size):
+                yield chunk
+
+    async def _chunks(self, chunk_size: int, max_size: Optional[int]) -> AsyncIterator[bytes]:
+        await self._load()
+        body = self._body
+        if body is not None:
+            # already read by read(), serve it from memory
+            self._check_size(len(body), max_size)
+            for start in range(0, len(body), chunk_size):
+                yield body[start:start + chunk_size]
+            return
+
+        response = await self._fetch()
+        self._check_size(self.size, max_size)
+
+        # kept for the image cache, unless the image is too big for it
+        chunks = [] if self._cache is not None and response.status == 200 else None
+        received = 0
+        self._streamed = True
+        try:
+            async for chunk in self._stream(response, chunk_size, max_size):
+                if chunks is not None:
+                    received += len(chunk)
+                    if received <= self._cache.max_item_size:
+                        chunks.append(chunk)
+                    else:
+                        chunks = None
+                yield chunk
+        except GeneratorExit:
+            # the loop over the chunks was left early, the connection is halfway through the body
+            response.close()
+            raise
+
+        if chunks is not None:
+            self._body = b"".join(chunks)
+            await self._store(response, self._body)
+        self.release()
+
+    async def read(self, bytesio = True, *, max_size: int = None, timeout: float = None) -> Union[bytes, BytesIO]:
+        async with self._reading():
+            self._begin(timeout)
+            _bytes = await self._read(max_size)
+
         if bytesio is False:
             return _bytes
 
         return BytesIO(_bytes)
 
+    async def _read(self, max_size: Optional[int]) -> bytes:
+        if self._body is None:
+            await self._load()
+        if self._body is None:
+            response = await self._fetch()
+            if max_size is None:
+                try:
+                    self._body = await response.read()
+                except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+                    self._abort(exc)
+            else:
+                self._check_size(self.size, max_size)
+                self._body = b"".join([chunk async for chunk in self._stream(response, 65536, max_size)])
+            await self._store(response, self._body)
+        else:
+            self._check_size(len(self._body), max_size)
+
+        if isinstance(self._body, bytearray):
+            # the buffer of read_view()
+            self._body = bytes(self._body)
+        return self._body
+
+    async def read_view(self, *, max_size: int = None, timeout: float = None) -> memoryview:
+        async with self._reading():
+            self._begin(timeout)
+            return await self._read_view(max_size)
+
+    async def _read_view(self, max_size: Optional[int]) -> memoryview:
+        await self._load()
+        if self._body is None and self._cache is not None:
+            # the image cache keeps the bytes anyway, a view of them saves copying them into a buffer
+            await self._read(max_size)
+        if self._body is not None:
+            self._check_size(len(self._body), max_size)
+            return memoryview(self._body)
+
+        response = await self._fetch()
+        size = self.size
+        self._check_size(size, max_size)
+
+        # one buffer, sized up front when the length is known
+        buffer = bytearray(size) if size is not None else bytearray()
+        received = 0
+        async for chunk in self._stream(response, 65536, max_size):
+            end = received + len(chunk)
+            buffer[received:end] = chunk
+            received = end
+        if received != len(buffer):
+            del buffer[received:]
+
+        # the buffer is the body from now on
+        self._body = buffer
+        self.release()
+        return memoryview(buffer)
+
+    async def save_to(
+        self,
+        fp: Union[str, PathLike, BinaryIO],
+        *,
+        chunk_size: int = 65536,
+        max_size: int = None,
+        timeout: float = None
+    ) -> int:
+        async with self._reading():
+            self._begin(timeout)
+            if isinstance(fp, (str, PathLike)):
+                return await self._save_to_path(os.fspath(fp), chunk_size, max_size)
+
+            return await self._write_to(fp, chunk_size, max_size)
+
+    async def _save_to_path(self, path: str, chunk_size: int, max_size: Optional[int]) -> int:
+        # checked before the file is created, with Content-Length or the body that was read already
+        await self._load()
+        if self._body is None:
+            await self._fetch()
+        self._check_size(self.size, max_size)
+
+        # written next to it and renamed when it's done, a failed download leaves what was at the path
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary, "xb") as file:
+                written = await self._write_to(file, chunk_size, max_size)
+            os.replace(temporary, path)
+        except BaseException:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+        return written
+
+    async def _write_to(self, file: BinaryIO, chunk_size: int, max_size: Optional[int]) -> int:
+        written = 0
+        async for chunk in self._chunks(chunk_size, max_size):
+            file.write(chunk)
+            written += len(chunk)
+        return written
+
 
 class Pastebin:
+    __slots__ = ("_data",)
+
     def __init__(self, data: dict) -> None:
-        self.code: str = data.get("code")
-        self.url: str = data.get("url")
-        self.raw: str = data.get("raw")
-        self.text: str = data.get("text")
-        self.privacy_type: str = data.get("privacy")
+        self._data: dict = data
+
+    @property
+    def code(self) -> str:
+        return self._data.get("code")
+
+    @property
+    def url(self) -> str:
+        return self._data.get("url")
+
+    @property
+    def raw(self) -> str:
+        return self._data.get("raw")
+
+    @property
+    def text(self) -> str:
+        return self._data.get("text")
+
+    @property
+    def privacy_type(self) -> str:
+        return self._data.get("privacy")
 
     def __str__(self):
         return self.url
@@ -47,10 +402,19 @@ class Pastebin:
 
 
 class Imgur:
-    def __init__(self, image_response: ClientResponse, data: dict) -> None:
-        self._image_response: ClientResponse = image_response
-        self.code: str = data.get("code")
-        self.type: str = data.get("type")
+    __slots__ = ("_data", "image")
+
+    def __init__(self, image: Image, data: dict) -> None:
+        self._data: dict = data
+        self.image: Image = image
+
+    @property
+    def code(self) -> str:
+        return self._data.get("code")
+
+    @property
+    def type(self) -> str:
+        return self._data.get("type")
 
     def __str__(self):
         return self.code
@@ -58,18 +422,33 @@ class Imgur:
     def __repr__(self):
         return "<Imgur code={0.code} type={0.type} image={0.image!r}>".format(self)
 
-    @property
-    def image(self):
-        return Image(str(self._image_response.url), self._image_response)
+    async def __aenter__(self) -> "Imgur":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.release()
+
+    def release(self) -> None:
+        self.image.release()
 
 
 class User:
+    __slots__ = ("_data", "_cs_activity")
 
     def __init__(self, data: dict) -> None:
         self._data: dict = data
-        self.username: str = data.get("username")
-        self.status: Optional[str] = _UNDEFINED_OR_NULL(data.get("user_status", None))
-        self.activity: User.Activity = User.Activity(data)
+
+    @property
+    def username(self) -> str:
+        return self._data.get("username")
+
+    @property
+    def status(self) -> Optional[str]:
+        return _UNDEFINED_OR_NULL(self._data.get("user_status", None))
+
+    @_cached_slot_property
+    def activity(self) -> "User.Activity":
+        return User.Activity(self._data)
 
     @property
     def id(self):
@@ -96,10 +475,22 @@ class User:
         return int(self._data['id'])
 
     class Activity:
+        __slots__ = ("_data",)
+
         def __init__(self, data: dict) -> None:
-            self.type: Optional[str] = _UNDEFINED_OR_NULL(data.get("status_type"))
-            self.text: Optional[str] = _UNDEFINED_OR_NULL(data.get("custom_status"))
-            self.emoji: Optional[str] = _UNDEFINED_OR_NULL(data.get("custom_status_emoji"))
+            self._data: dict = data
+
+        @property
+        def type(self) -> Optional[str]:
+            return _UNDEFINED_OR_NULL(self._data.get("status_type"))
+
+        @property
+        def text(self) -> Optional[str]:
+            return _UNDEFINED_OR_NULL(self._data.get("custom_status"))
+
+        @property
+        def emoji(self) -> Optional[str]:
+            return _UNDEFINED_OR_NULL(self._data.get("custom_status_emoji"))
 
         def __repr__(self):
             return "<Activity type={0.type} text={0.text} emoji={0.emoji}>".format(self)
@@ -109,13 +500,30 @@ class User:
 
 
 class Invite:
+    __slots__ = ("_data", "_cs_inviter", "_cs_guild", "_cs_channel")
+
     def __init__(self, data: dict) -> None:
         self._data: dict = data
-        self.code: str = data.get("code")
-        self.url: str = data.get("url")
-        self.inviter: Invite.Inviter = Invite.Inviter(self._data)
-        self.guild: Invite.Guild = Invite.Guild(self._data)
-        self.channel: Invite.Channel = Invite.Channel(self._data)
+
+    @property
+    def code(self) -> str:
+        return self._data.get("code")
+
+    @property
+    def url(self) -> str:
+        return self._data.get("url")
+
+    @_cached_slot_property
+    def inviter(self) -> "Invite.Inviter":
+        return Invite.Inviter(self._data)
+
+    @_cached_slot_property
+    def guild(self) -> "Invite.Guild":
+        return Invite.Guild(self._data)
+
+    @_cached_slot_property
+    def channel(self) -> "Invite.Channel":
+        return Invite.Channel(self._data)
 
     def __str__(self):
         return self.code
@@ -125,13 +533,26 @@ class Invite:
                "guild={0.guild!r} channel={0.channel!r}>".format(self)
 
     class Inviter:
+        __slots__ = ("_data",)
+
         def __init__(self, data: dict) -> None:
             self._data: dict = data
-            self._tag: str = data.get("inviter_tag")
-            self.__split_tag: list = self._tag.split("#")
-            self.username: str = self.__split_tag[0]
-            self.discriminator: str = self.__split_tag[1]
-            self.id: int = int(data.get("inviter_id"))
+
+        @property
+        def _tag(self) -> str:
+            return self._data.get("inviter_tag")
+
+        @property
+        def username(self) -> str:
+            return self._tag.split("#")[0]
+
+        @property
+        def discriminator(self) -> str:
+            return self._tag.split("#")[1]
+
+        @property
+        def id(self) -> int:
+            return int(self._data.get("inviter_id"))
 
         def __str__(self):
             return self._tag if self._tag else ''
@@ -143,19 +564,30 @@ class Invite:
             return "<Inviter username={0.username} discriminator={0.discriminator} id={0.id}>".format(self)
 
     class Guild:
+        __slots__ = ("_data", "_cs_features")
+
         def __init__(self, data: dict) -> None:
             self._data: dict = data
-            self.name: str = data.get("guild_name")
-            self.members: Optional[int] = _UNDEFINED_OR_NULL(data.get("guild_members", 0), True)
-            self.id: int = int(data.get("guild_id"))
-            self.description: Optional[str] = _UNDEFINED_OR_NULL(data.get("guild_description"))
 
         @property
+        def name(self) -> str:
+            return self._data.get("guild_name")
+
+        @property
+        def members(self) -> Optional[int]:
+            return _UNDEFINED_OR_NULL(self._data.get("guild_members", 0), True)
+
+        @property
+        def id(self) -> int:
+            return int(self._data.get("guild_id"))
+
+        @property
+        def description(self) -> Optional[str]:
+            return _UNDEFINED_OR_NULL(self._data.get("guild_description"))
+
+        @_cached_slot_property
         def features(self) -> Optional[list]:
-            features_string = _UNDEFINED_OR_NULL(self._data.get("guild_features"))
-            if features_string:
-                return features_string.strip().split(",")
-            return []
+            return _split_list(self._data.get("guild_features"))
 
         def __str__(self):
             return self.name
@@ -168,10 +600,18 @@ class Invite:
                    "members={0.members} features={0.features}>".format(self)
 
     class Channel:
+        __slots__ = ("_data",)
+
         def __init__(self, data: dict) -> None:
             self._data: dict = data
-            self.name: str = data.get("channel_name")
-            self.id: int = int(data.get("channel_id"))
+
+        @property
+        def name(self) -> str:
+            return self._data.get("channel_name")
+
+        @property
+        def id(self) -> int:
+            return int(self._data.get("channel_id"))
 
         def __str__(self):
             return self.name
@@ -184,28 +624,42 @@ class Invite:
 
 
 class Template:
+    __slots__ = ("_data", "_cs_creator", "_cs_guild", "_cs_roles", "_cs_channels")
+
     def __init__(self, data: dict) -> None:
         self._data: dict = data
-        self.code: str = data.get("code")
-        self.url: str = data.get("url")
-        self.description: str = _UNDEFINED_OR_NULL(data.get("description"))
-        self.usage_count: int = int(data.get("usage_count"))
-        self.creator: Template.Creator = Template.Creator(self._data)
-        self.guild: Template.Guild = Template.Guild(self._data)
 
     @property
-    def roles(self) -> Optional[list]:
-        roles_string = _UNDEFINED_OR_NULL(self._data.get("roles"))
-        if roles_string:
-            return roles_string.strip().split(",")
-        return []
+    def code(self) -> str:
+        return self._data.get("code")
+
+    @property
+    def url(self) -> str:
+        return self._data.get("url")
+
+    @property
+    def description(self) -> Optional[str]:
+        return _UNDEFINED_OR_NULL(self._data.get("description"))
 
     @property
+    def usage_count(self) -> int:
+        return int(self._data.get("usage_count"))
+
+    @_cached_slot_property
+    def creator(self) -> "Template.Creator":
+        return Template.Creator(self._data)
+
+    @_cached_slot_property
+    def guild(self) -> "Template.Guild":
+        return Template.Guild(self._data)
+
+    @_cached_slot_property
+    def roles(self) -> Optional[list]:
+        return _split_list(self._data.get("roles"))
+
+    @_cached_slot_property
     def channels(self) -> Optional[list]:
-        channels_string = _UNDEFINED_OR_NULL(self._data.get("channels"))
-        if channels_string:
-            return channels_string.strip().split(",")
-        return []
+        return _split_list(self._data.get("channels"))
 
     def __str__(self):
         return str(self._data['code'])
@@ -216,13 +670,26 @@ class Template:
                "creator={0.creator!r} guild={0.guild!r}>".format(self)
 
     class Creator:
+        __slots__ = ("_data",)
+
         def __init__(self, data: dict) -> None:
             self._data: dict = data
-            self._creator_tag: str = data.get("creator_tag")
-            self.__split_creator_tag: list = self._creator_tag.split("#")
-            self.username: str = self.__split_creator_tag[0]
-            self.id: int = int(data.get("creator_id"))
-            self.discriminator: str = self.__split_creator_tag[1]
+
+        @property
+        def _creator_tag(self) -> str:
+            return self._data.get("creator_tag")
+
+        @property
+        def username(self) -> str:
+            return self._creator_tag.split("#")[0]
+
+        @property
+        def discriminator(self) -> str:
+            return self._creator_tag.split("#")[1]
+
+        @property
+        def id(self) -> int:
+            return int(self._data.get("creator_id"))
 
         def __str__(self):
             return self._creator_tag if self._creator_tag else ''
@@ -234,12 +701,26 @@ class Template:
             return "<Creator username={0.username} id={0.id} discriminator={0.discriminator}>".format(self)
 
     class Guild:
+        __slots__ = ("_data",)
+
         def __init__(self, data: dict) -> None:
             self._data: dict = data
-            self.name: str = data.get("guild_name")
-            self.id: int = int(data.get("guild_id"))
-            self.region: str = data.get("guild_region")
-            self.verification_level: int = int(data.get("guild_verification_level"))
+
+        @property
+        def name(self) -> str:
+            return self._data.get("guild_name")
+
+        @property
+        def id(self) -> int:
+            return int(self._data.get("guild_id"))
+
+        @property
+        def region(self) -> str:
+            return self._data.get("guild_region")
+
+        @property
+        def verification_level(self) -> int:
+            return int(self._data.get("guild_verification_level"))
 
         def __str__(self):
             return self.name
@@ -253,10 +734,22 @@ class Template:
 
 
 class Emojified:
+    __slots__ = ("_data", "_cs_emojis_list")
+
     def __init__(self, data: dict) -> None:
-        self.text: str = data.get("text")
-        self.emojis: str = data.get("emojify")
-        self.emojis_list: list = self.emojis.split(" ")
+        self._data: dict = data
+
+    @property
+    def text(self) -> str:
+        return self._data.get("text")
+
+    @property
+    def emojis(self) -> str:
+        return self._data.get("emojify")
+
+    @_cached_slot_property
+    def emojis_list(self) -> list:
+        return self.emojis.split(" ")
 
     def __str__(self):
         return str(self.emojis)
@@ -266,14 +759,38 @@ class Emojified:
 
 
 class ParsedMS:
+    __slots__ = ("_data",)
+
     def __init__(self, data: dict) -> None:
-        self.days: int = int(data.get("days"))
-        self.hours: int = int(data.get("hours"))
-        self.minutes: int = int(data.get("minutes"))
-        self.seconds: int = int(data.get("seconds"))
-        self.milliseconds: int = int(data.get("milliseconds"))
-        self.microseconds: int = int(data.get("microseconds"))
-        self.nanoseconds: int = int(data.get("nanoseconds"))
+        self._data: dict = data
+
+    @property
+    def days(self) -> int:
+        return int(self._data.get("days"))
+
+    @property
+    def hours(self) -> int:
+        return int(self._data.get("hours"))
+
+    @property
+    def minutes(self) -> int:
+        return int(self._data.get("minutes"))
+
+    @property
+    def seconds(self) -> int:
+        return int(self._data.get("seconds"))
+
+    @property
+    def milliseconds(self) -> int:
+        return int(self._data.get("milliseconds"))
+
+    @property
+    def microseconds(self) -> int:
+        return int(self._data.get("microseconds"))
+
+    @property
+    def nanoseconds(self) -> int:
+        return int(self._data.get("nanoseconds"))
 
     def __repr__(self):
         return "<ParsedMS days={0.days} hours={0.hours} minutes={0.minutes} seconds={0.seconds} " \
@@ -284,10 +801,22 @@ class ParsedMS:
 
 
 class Translated:
+    __slots__ = ("_data",)
+
     def __init__(self, data: dict) -> None:
-        self.input: str = data.get("text")
-        self.text: str = data.get("translated")
-        self.translated_to: str = data.get("translatedTo")
+        self._data: dict = data
+
+    @property
+    def input(self) -> str:
+        return self._data.get("text")
+
+    @property
+    def text(self) -> str:
+        return self._data.get("translated")
+
+    @property
+    def translated_to(self) -> str:
+        return self._data.get("translatedTo")
 
     def __str__(self):
         return str(self.text)
@@ -297,11 +826,26 @@ class Translated:
 
 
 class YoutubeVideo:
+    __slots__ = ("_data",)
+
     def __init__(self, data: dict) -> None:
-        self.title: str = data.get("title")
-        self.description: str = data.get("description")
-        self.url: str = data.get("url")
-        self.channel_id: str = data.get("channel_id")
+        self._data: dict = data
+
+    @property
+    def title(self) -> str:
+        return self._data.get("title")
+
+    @property
+    def description(self) -> str:
+        return self._data.get("description")
+
+    @property
+    def url(self) -> str:
+        return self._data.get("url")
+
+    @property
+    def channel_id(self) -> str:
+        return self._data.get("channel_id")
 
     def __str__(self):
         return str(self.url)
@@ -312,11 +856,23 @@ class YoutubeVideo:
 
 
 class RandomEmoji:
-    def __init__(self, image_response: ClientResponse, data: dict) -> None:
-        self._image_response: ClientResponse = image_response
-        self.name: str = data.get("title")
-        self.category: int = int(data.get("category"))
-        self.is_nsfw: bool = data.get("nsfw")
+    __slots__ = ("_data", "image")
+
+    def __init__(self, image: Image, data: dict) -> None:
+        self._data: dict = data
+        self.image: Image = image
+
+    @property
+    def name(self) -> str:
+        return self._data.get("title")
+
+    @property
+    def category(self) -> int:
+        return int(self._data.get("category"))
+
+    @property
+    def is_nsfw(self) -> bool:
+        return self._data.get("nsfw")
 
     def __str__(self):
         return self.name
@@ -324,6 +880,11 @@ class RandomEmoji:
     def __repr__(self):
         return "<RandomEmoji name={0.name} category={0.category} is_nsfw={0.is_nsfw} image={0.image!r}>".format(self)
 
-    @property
-    def image(self):
-        return Image(str(self._image_response.url), self._image_response)
+    async def __aenter__(self) -> "RandomEmoji":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.release()
+
+    def release(self) -> None:
+        self.image.release()
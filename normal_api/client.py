@@ -1,143 +1,747 @@
+import asyncio
+import gzip
+import json
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple
 from urllib.parse import quote, urlencode
 
-from aiohttp import ClientSession
-
+from . import local as _local
+from .cache import NONDETERMINISTIC_ENDPOINTS, WRITE_ENDPOINTS, BaseCache, StaleWhileRevalidate, make_key
+from .circuit import CircuitBreaker, ConcurrencyLimiter, is_failure
 from .classes import *
 from .errors import *
-from .http import HTTPSession
+from .http import HTTPConfig, HTTPSession, is_connection_error, wait_until
+from .imagecache import ImageCache
+from .metrics import Instrumentation, RequestTimer
+from .ratelimit import RateLimiter, RetryPolicy, parse_retry_after
+from .routing import Router
+from .utils import JSONLoads, from_json, split_text
+from .votes import VoteIndex
+
+if TYPE_CHECKING:
+    from aiohttp import ClientResponse, ClientSession
+
+# endpoints that take their parameters as a JSON body in a POST, see Client(post_threshold)
+BODY_ENDPOINTS = frozenset({"pastebin", "safenote", "translate", "emojify"})
+# smaller bodies aren't worth compressing
+_COMPRESS_MIN_SIZE = 1024
 
 
 class Client:
-    __slots__ = ("_session", "_api_url")
+    __slots__ = (
+        "_session",
+        "_api_url",
+        "_router",
+        "_cache",
+        "_coalesce",
+        "_inflight",
+        "_coalesced",
+        "_ratelimiter",
+        "_retry_policy",
+        "_lazy_images",
+        "_json_loads",
+        "_local_endpoints",
+        "_revalidate",
+        "_instrumentation",
+        "_circuit_breaker",
+        "_concurrency_limiter",
+        "_timeout",
+        "_image_cache",
+        "_post_threshold",
+        "_compress_bodies",
+        "_text_chunk_size",
+        "_vote_index",
+    )
+
+    def __init__(
+        self,
+        *,
+        session: "ClientSession" = None,
+        api_url: Union[str, Sequence[str]] = "https://normal-api.ml/",
+        router: Router = None,
+        http_config: HTTPConfig = None,
+        cache: BaseCache = None,
+        revalidate: StaleWhileRevalidate = None,
+        coalesce_requests: bool = True,
+        ratelimiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        lazy_images: bool = True,
+        json_loads: JSONLoads = None,
+        local: Union[bool, Iterable[str]] = False,
+        instrumentation: Instrumentation = None,
+        circuit_breaker: CircuitBreaker = None,
+        concurrency_limiter: ConcurrencyLimiter = None,
+        timeout: float = None,
+        image_cache: ImageCache = None,
+        post_threshold: int = None,
+        compress_bodies: bool = False,
+        text_chunk_size: int = None,
+        vote_index: VoteIndex = None
+    ) -> None:
+        self._session = session or HTTPSession(http_config)
+        if not isinstance(api_url, str):
+            # more than one base URL, requests are spread over them
+            if router is None and len(api_url) > 1:
+                router = Router(api_url)
+            api_url = api_url[0]
+        self._router = router
+        self._api_url = router.urls[0] if router is not None else api_url
+        if not self._api_url.endswith("/"):
+            self._api_url += "/"
+        self._cache = cache
+        self._revalidate = revalidate
+        self._coalesce = coalesce_requests
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._coalesced = 0
+        self._ratelimiter = ratelimiter
+        self._retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self._lazy_images = lazy_images
+        self._json_loads = json_loads or from_json
+        if local is True:
+            local = _local.DEFAULT_ENDPOINTS
+        elif local is False:
+            local = ()
+        self._local_endpoints = frozenset(endpoint for endpoint in local if endpoint in _local.ENDPOINTS)
+        self._instrumentation = instrumentation
+        self._circuit_breaker = circuit_breaker
+        self._concurrency_limiter = concurrency_limiter
+        self._timeout = timeout
+        self._image_cache = image_cache
+        self._post_threshold = post_threshold
+        self._compress_bodies = compress_bodies
+        self._text_chunk_size = text_chunk_size
+        self._vote_index = vote_index
+        if instrumentation is not None and hasattr(self._session, "trace_configs"):
+            # only has effect if the aiohttp session wasn't created yet
+            self._session.trace_configs.append(instrumentation.trace_config())
+
+    @property
+    def cache(self) -> Optional[BaseCache]:
+        return self._cache
+
+    @property
+    def image_cache(self) -> Optional[ImageCache]:
+        return self._image_cache
+
+    @property
+    def vote_index(self) -> Optional[VoteIndex]:
+        return self._vote_index
+
+    @property
+    def ratelimiter(self) -> Optional[RateLimiter]:
+        return self._ratelimiter
+
+    @property
+    def instrumentation(self) -> Optional[Instrumentation]:
+        return self._instrumentation
+
+    @property
+    def router(self) -> Optional[Router]:
+        return self._router
+
+    @property
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        return self._circuit_breaker
+
+    @property
+    def concurrency_limiter(self) -> Optional[ConcurrencyLimiter]:
+        return self._concurrency_limiter
+
+    @property
+    def coalesced_requests(self) -> int:
+        return self._coalesced
+
+    def _deadline(self, timeout: Optional[float]) -> Optional[float]:
+        # One deadline for everything a call does, including retries and downloading images
+        if timeout is None:
+            timeout = self._timeout
+        return time.monotonic() + timeout if timeout is not None else None
+
+    async def _api_request(
+        self, endpoint: str, params: dict = None, *, use_cache: bool = True, deadline: float = None
+    ) -> Optional[dict]:
+        if endpoint in self._local_endpoints:
+            return _local.compute(endpoint, params)
+
+        ttl = self._cache.ttl_for(endpoint) if self._cache is not None else None
+        key = make_key(endpoint, params)
+        if ttl and use_cache:
+            if self._revalidate is not None and endpoint in self._revalidate.endpoints:
+                entry = await self._cache.get_entry(key)
+                if entry is not None:
+                    return self._revalidated(entry, key, endpoint, params, ttl)
+                self._cache.stats.misses += 1
+            else:
+                cached = await self._cache.get(key)
+                if cached is not None:
+                    if self._instrumentation is not None:
+                        self._instrumentation.cache_hit(endpoint)
+                    return cached
+
+        if not self._coalesce or endpoint in WRITE_ENDPOINTS or endpoint in NONDETERMINISTIC_ENDPOINTS:
+            return await self._fetch(key, endpoint, params, ttl, deadline)
+
+        # Identical requests that are already running share the same task,
+        # shield() keeps it alive if the caller that started it gets cancelled.
+        while True:
+            task = self._inflight.get(key)
+            started = task is None
+            if started:
+                task = self._start_fetch(key, endpoint, params, ttl, deadline)
+            else:
+                self._coalesced += 1
+                if self._instrumentation is not None:
+                    self._instrumentation.coalesced(endpoint)
+
+            try:
+                return await wait_until(asyncio.shield(task), deadline)
+            except DeadlineExceeded:
+                # the shared request ran out of the time of the call that started it, try again if there's time left
+                if started or not task.done() or (deadline is not None and time.monotonic() >= deadline):
+                    raise
+
+    def _start_fetch(
+        self, key: str, endpoint: str, params: Optional[dict], ttl: Optional[float], deadline: float = None
+    ) -> asyncio.Future:
+        task = asyncio.ensure_future(self._fetch(key, endpoint, params, ttl, deadline))
+        task.add_done_callback(partial(self._inflight_done, key))
+        if self._coalesce:
+            self._inflight[key] = task
+        return task
 
-    def __init__(self, *, session: ClientSession = None) -> None:
-        self._session = session or HTTPSession()
-        self._api_url = "https://normal-api.ml/"
+    def _inflight_done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
 
-    async def _api_request(self, endpoint: str, params: dict = None) -> Optional[dict]:
+        # mark the exception as retrieved, every waiter gets it re-raised from the shield
+        if not task.cancelled():
+            task.exception()
 
-        url = f"{self._api_url}{endpoint}"
+    def _revalidated(self, entry: Tuple[Any, float], key: str, endpoint: str, params: Optional[dict], ttl: float):
+        value, remaining = entry
+        policy = self._revalidate
+        if remaining <= 0:
+            policy.stale_hits += 1
+        self._cache.stats.hits += 1
+        if self._instrumentation is not None:
+            self._instrumentation.cache_hit(endpoint)
+
+        if policy.should_refresh(endpoint, remaining, ttl) and key not in policy.pending:
+            if len(policy.pending) >= policy.max_pending:
+                # the queue is full, a later hit will try again
+                policy.dropped += 1
+            else:
+                task = self._inflight.get(key) or self._start_fetch(key, endpoint, params, ttl)
+                policy.pending[key] = task
+                policy.refreshes += 1
+                task.add_done_callback(lambda _: policy.pending.pop(key, None))
+
+        return value
+
+    async def _fetch(
+        self, key: str, endpoint: str, params: Optional[dict], ttl: Optional[float], deadline: float = None
+    ) -> Optional[dict]:
+        response = await self._request(endpoint, params, deadline)
+        if ttl and response is not None:
+            stale = self._revalidate.stale_for(endpoint) if self._revalidate is not None else 0.0
+            await self._cache.set(key, response, ttl, stale = stale)
+        return response
+
+    def _body(self, params: dict) -> dict:
+        body = json.dumps(params, separators = (",", ":")).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self._compress_bodies and len(body) >= _COMPRESS_MIN_SIZE:
+            body = gzip.compress(body, compresslevel = 6)
+            headers["Content-Encoding"] = "gzip"
+        return {"method": "post", "data": body, "headers": headers}
+
+    async def _request(self, endpoint: str, params: dict = None, deadline: float = None) -> Optional[dict]:
+        path = endpoint
+        options = None
         if params:
-            encoded_param = urlencode(params, quote_via = quote)
-            url += f"?{encoded_param}"
+            threshold = self._post_threshold
+            # the size before encoding, percent-encoding a large text only to find out it's too long is slow
+            if threshold is not None and endpoint in BODY_ENDPOINTS and \
+                    sum(len(str(key)) + len(str(value)) + 2 for key, value in params.items()) > threshold:
+                options = self._body(params)
+            else:
+                encoded_param = urlencode(params, quote_via = quote)
+                path += f"?{encoded_param}"
+
+        router = self._router
+        idempotent = endpoint not in WRITE_ENDPOINTS
+        # Without a deadline no retry is started after the total timeout of the session, or a request that keeps
+        # timing out would be tried for max_retries times that long.
+        limit = deadline
+        if limit is None and self._session.config.total_timeout is not None:
+            limit = time.monotonic() + self._session.config.total_timeout
+        started = time.perf_counter()
+        attempt = 0
+        tried = []
+        error = None
+        try:
+            while True:
+                base = router.choose(endpoint, tried) if router is not None else self._api_url
+                try:
+                    return await wait_until(self._attempt(endpoint, f"{base}{path}", deadline, options), deadline)
+                except Exception as exc:
+                    if isinstance(exc, DeadlineExceeded):
+                        raise
+
+                    # Try another base URL straight away. Requests that create something only when they
+                    # couldn't have reached the server.
+                    if router is not None and is_failure(exc) and (idempotent or is_connection_error(exc, connecting = True)):
+                        tried.append(base)
+                        if router.has_alternative(endpoint, tried):
+                            router.failovers += 1
+                            continue
+                    tried.clear()
+
+                    delay = self._retry_policy.get_delay(exc, attempt, idempotent = idempotent)
+                    if delay is None or (limit is not None and time.monotonic() + delay >= limit):
+                        raise
+
+                    if isinstance(exc, TooManyRequests) and self._ratelimiter is not None:
+                        self._ratelimiter.pause(endpoint, delay)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            if self._instrumentation is not None:
+                self._instrumentation.request_end(endpoint, time.perf_counter() - started, error, attempt + 1)
+
+    async def _attempt(self, endpoint: str, url: str, deadline: Optional[float], options: dict = None) -> dict:
+        breaker = self._circuit_breaker
+        if breaker is not None:
+            breaker.check(endpoint)
+
+        try:
+            if self._ratelimiter is not None:
+                await self._ratelimiter.acquire(endpoint)
+            result = await self._measured_send(endpoint, url, deadline, options)
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.cancelled(endpoint)
+            raise
+        except Exception as exc:
+            if breaker is not None:
+                breaker.record(endpoint, exc)
+            raise
+
+        if breaker is not None:
+            breaker.record(endpoint)
+        return result
+
+    async def _measured_send(self, endpoint: str, url: str, deadline: Optional[float], options: dict = None) -> dict:
+        # the concurrency limiter and the router both adapt to the latency of the request
+        limiter = self._concurrency_limiter
+        router = self._router
+        if limiter is None and router is None:
+            return await self._send(endpoint, url, deadline, options)
+
+        started = await limiter.acquire(endpoint) if limiter is not None else time.monotonic()
+        error = None
+        try:
+            return await self._send(endpoint, url, deadline, options)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(endpoint, started, error)
+            if router is not None:
+                router.record(url, time.monotonic() - started, error)
+
+    async def _image(self, url: str, deadline: float = None, timeout: float = None) -> Image:
+        # downloads after the call's get its timeout again instead of what's left of its deadline
+        timeout = timeout if timeout is not None else self._timeout
+        if self._lazy_images:
+            return Image(str(url), session = self._session, timeout = timeout, cache = self._image_cache)
+
+        if self._image_cache is not None:
+            # read it now, it's probably cached anyway
+            image = Image(
+                str(url), session = self._session, deadline = deadline, timeout = timeout, cache = self._image_cache
+            )
+            await image.read(bytesio = False)
+            return image
+
+        response = await self._session.request(url, deadline = deadline)
+        return Image(str(response.url), response, session = self._session, deadline = deadline, timeout = timeout)
+
+    async def _send(self, endpoint: str, url: str, deadline: Optional[float], options: dict = None) -> dict:
+        try:
+            return await self._send_request(endpoint, url, deadline, options)
+        except asyncio.TimeoutError as exc:
+            # reading the body can also run out of the deadline, that's not the endpoint's fault
+            if deadline is None or isinstance(exc, DeadlineExceeded) or time.monotonic() < deadline:
+                raise
+            raise DeadlineExceeded() from exc
+
+    async def _send_request(self, endpoint: str, url: str, deadline: Optional[float], options: dict = None) -> dict:
+        # options are the method, body and headers of POST requests
+        options = options or {}
+        if self._instrumentation is None:
+            response = await self._session.request(str(url), deadline = deadline, **options)
+            return await self._handle(endpoint, response, None)
 
-        response = await self._session.request(str(url))
+        timer = RequestTimer(endpoint)
+        status = None
+        try:
+            response = await self._session.request(str(url), deadline = deadline, trace_request_ctx = timer, **options)
+            status = response.status
+            return await self._handle(endpoint, response, timer)
+        finally:
+            self._instrumentation.attempt_end(timer, status)
+
+    async def _handle(self, endpoint: str, response: "ClientResponse", timer: Optional[RequestTimer]) -> dict:
         res_status = response.status
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if self._ratelimiter is not None:
+            self._ratelimiter.update(endpoint, response.headers)
 
         if str(response.content_type) == "application/json":
-            json_response = await response.json()
+            # read the body once as bytes, the decoders don't need it as str
+            if timer is not None:
+                timer.start("body")
+            body = await response.read()
+            if timer is not None:
+                timer.end("body")
+                timer.start("decode")
+            json_response = self._json_loads(body)
+            if timer is not None:
+                timer.end("decode")
             json_status = int(json_response.get("status")) if json_response.get("status") else None
-            msg = json_response.get("error")
-            err_text = msg if msg else await response.text()
-
             if json_status == 200 or res_status == 200:
                 return json_response
-            elif json_status == 400 or res_status == 400:
+
+            err_text = json_response.get("error") or body.decode(response.get_encoding(), "replace")
+            if json_status == 400 or res_status == 400:
                 raise BadRequest(err_text)
             elif json_status == 403 or res_status == 403:
                 raise Forbidden(err_text)
             elif json_status == 404 or res_status == 404:
                 raise NotFound(err_text)
+            elif json_status == 429 or res_status == 429:
+                raise TooManyRequests(err_text, retry_after = retry_after)
             elif json_status == 500 or res_status == 500:
                 raise InternalServerError(err_text)
+            elif json_status == 503 or res_status == 503:
+                raise ServiceUnavailable(err_text, retry_after = retry_after)
+            raise HTTPException(response, err_text)
+        elif res_status == 429:
+            raise TooManyRequests(str(await response.text()), retry_after = retry_after)
+        elif res_status == 503:
+            raise ServiceUnavailable(str(await response.text()), retry_after = retry_after)
         else:
             raise HTTPException(response, str(await response.text()))
 
-    async def pastebin(self, text: str, *, privacy: str = "public") -> Pastebin:
+    async def pastebin(self, text: str, *, privacy: str = "public", timeout: float = None) -> Pastebin:
         VALID_PRIVACY_VALUES = ["public", "unlisted"]
         if str(privacy) not in VALID_PRIVACY_VALUES:
             raise BadRequest(f"Invalid Privacy Value. Valid values: {', '.join(VALID_PRIVACY_VALUES)}")
-        response = await self._api_request("pastebin", {"text": str(text), "privacy": str(privacy)})
+        response = await self._api_request(
+            "pastebin", {"text": str(text), "privacy": str(privacy)}, deadline = self._deadline(timeout)
+        )
         data = response
         data["privacy"] = str(privacy)
         return Pastebin(data)
 
-    async def imgur(self, url: str, *, title: str = None) -> Imgur:
+    async def imgur(self, url: str, *, title: str = None, timeout: float = None) -> Imgur:
         params = {"url": url}
         if title:
             params['title'] = str(title)
 
-        response = await self._api_request("imgur", params)
-        image = await self._session.request(response['url'])
+        deadline = self._deadline(timeout)
+        response = await self._api_request("imgur", params, deadline = deadline)
+        image = await self._image(response['url'], deadline, timeout)
         return Imgur(image, response)
 
-    async def ordinal(self, number: int) -> str:
-        response = await self._api_request("ordinal", {"num": int(number)})
+    async def ordinal(self, number: int, *, timeout: float = None) -> str:
+        response = await self._api_request("ordinal", {"num": int(number)}, deadline = self._deadline(timeout))
         return response['ordinal']
 
-    async def user_status(self, user_id: int) -> User:
-        response = await self._api_request("userstatus", {"userid": int(user_id)})
+    async def user_status(self, user_id: int, *, use_cache: bool = True, timeout: float = None) -> User:
+        response = await self._api_request(
+            "userstatus", {"userid": int(user_id)}, use_cache = use_cache, deadline = self._deadline(timeout)
+        )
         return User(response)
 
-    async def invite_info(self, code: str) -> Invite:
-        response = await self._api_request("inviteinfo", {"code": str(code)})
+    async def invite_info(self, code: str, *, use_cache: bool = True, timeout: float = None) -> Invite:
+        response = await self._api_request(
+            "inviteinfo", {"code": str(code)}, use_cache = use_cache, deadline = self._deadline(timeout)
+        )
         return Invite(response)
 
-    async def template_info(self, code: str) -> Template:
-        response = await self._api_request("templateinfo", {"code": str(code)})
+    async def template_info(self, code: str, *, use_cache: bool = True, timeout: float = None) -> Template:
+        response = await self._api_request(
+            "templateinfo", {"code": str(code)}, use_cache = use_cache, deadline = self._deadline(timeout)
+        )
         return Template(response)
 
-    async def emojify(self, text: str) -> Emojified:
-        response = await self._api_request("emojify", {"text": str(text)})
-        return Emojified(response)
+    # Batch
+
+    async def _many(
+        self,
+        method: Callable[[Any], Awaitable[Any]],
+        keys: Iterable[Any],
+        concurrency: int,
+        ordered: bool
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        unique = list(dict.fromkeys(keys))
+        if not unique:
+            return
+
+        results: asyncio.Queue = asyncio.Queue()
+        jobs = iter(enumerate(unique))
+
+        async def worker():
+            for index, key in jobs:
+                try:
+                    result = await method(key)
+                except Exception as exc:
+                    result = exc
+                await results.put((index, key, result))
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(concurrency, len(unique)))]
+        try:
+            finished = {}
+            next_index = 0
+            for _ in range(len(unique)):
+                index, key, result = await results.get()
+                if not ordered:
+                    yield key, result
+                    continue
+
+                finished[index] = (key, result)
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+        finally:
+            for task in workers:
+                task.cancel()
+
+    def invite_info_many(
+        self,
+        codes: Iterable[str],
+        *,
+        concurrency: int = 10,
+        ordered: bool = False,
+        use_cache: bool = True,
+        timeout: float = None
+    ) -> AsyncIterator[Tuple[str, Union[Invite, Exception]]]:
+        method = partial(self.invite_info, use_cache = use_cache, timeout = timeout)
+        return self._many(method, (str(code) for code in codes), concurrency, ordered)
+
+    def template_info_many(
+        self,
+        codes: Iterable[str],
+        *,
+        concurrency: int = 10,
+        ordered: bool = False,
+        use_cache: bool = True,
+        timeout: float = None
+    ) -> AsyncIterator[Tuple[str, Union[Template, Exception]]]:
+        method = partial(self.template_info, use_cache = use_cache, timeout = timeout)
+        return self._many(method, (str(code) for code in codes), concurrency, ordered)
 
-    async def parse_milliseconds(self, milliseconds: int) -> ParsedMS:
-        response = await self._api_request("parsems", {"ms": int(milliseconds)})
+    def user_status_many(
+        self,
+        user_ids: Iterable[int],
+        *,
+        concurrency: int = 10,
+        ordered: bool = False,
+        use_cache: bool = True,
+        timeout: float = None
+    ) -> AsyncIterator[Tuple[int, Union[User, Exception]]]:
+        method = partial(self.user_status, use_cache = use_cache, timeout = timeout)
+        return self._many(method, (int(user_id) for user_id in user_ids), concurrency, ordered)
+
+    def _chunks(self, endpoint: str, text: str, chunk_size: Optional[int]) -> Optional[List[Tuple[str, str]]]:
+        chunk_size = chunk_size if chunk_size is not None else self._text_chunk_size
+        if chunk_size is None or len(text) <= chunk_size or endpoint in self._local_endpoints:
+            return None
+        return split_text(text, chunk_size)
+
+    @staticmethod
+    async def _gather(coros: Iterable[Awaitable[Any]]) -> List[Any]:
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            # gather leaves the other chunks running when one raises
+            for task in tasks:
+                task.cancel()
+
+    async def emojify(self, text: str, *, timeout: float = None, chunk_size: int = None) -> Emojified:
+        text = str(text)
+        deadline = self._deadline(timeout)
+        chunks = self._chunks("emojify", text, chunk_size)
+        if chunks is None:
+            response = await self._api_request("emojify", {"text": text}, deadline = deadline)
+            return Emojified(response)
+
+        leading = ""
+        if not chunks[0][0]:
+            # whitespace at the start of the text is the only chunk without anything to emojify, kept as it is
+            leading = chunks.pop(0)[1]
+
+        # every character becomes an emoji and they're joined with spaces, so the whitespace stays in the chunks
+        responses = await self._gather(
+            self._api_request("emojify", {"text": chunk + space}, deadline = deadline) for chunk, space in chunks
+        )
+        emojified = " ".join(str(response["emojify"]) for response in responses)
+        return Emojified({"text": text, "emojify": leading + emojified})
+
+    async def parse_milliseconds(self, milliseconds: int, *, timeout: float = None) -> ParsedMS:
+        response = await self._api_request("parsems", {"ms": int(milliseconds)}, deadline = self._deadline(timeout))
         return ParsedMS(response)
 
-    async def translate(self, text: str, *, to_language: str) -> Translated:
-        response = await self._api_request("translate", {"text": str(text), "to": str(to_language)})
-        return Translated(response)
+    async def translate(
+        self, text: str, *, to_language: str, use_cache: bool = True, timeout: float = None, chunk_size: int = None
+    ) -> Translated:
+        text = str(text)
+        deadline = self._deadline(timeout)
+        chunks = self._chunks("translate", text, chunk_size)
+        if chunks is None:
+            response = await self._api_request(
+                "translate", {"text": text, "to": str(to_language)}, use_cache = use_cache, deadline = deadline
+            )
+            return Translated(response)
+
+        async def translate_chunk(chunk: str) -> dict:
+            if not chunk:
+                return {"translated": ""}
+            return await self._api_request(
+                "translate", {"text": chunk, "to": str(to_language)}, use_cache = use_cache, deadline = deadline
+            )
+
+        responses = await self._gather(translate_chunk(chunk) for chunk, _ in chunks)
+        translated = "".join(
+            f"{response['translated']}{space}" for response, (_, space) in zip(responses, chunks)
+        )
+        translated_to = next((response["translatedTo"] for response in responses if "translatedTo" in response), None)
+        return Translated({"text": text, "translated": translated, "translatedTo": translated_to})
 
-    async def youtube_video_search(self, query: str) -> YoutubeVideo:
-        response = await self._api_request("youtube/searchvideo", {"query": str(query)})
+    async def youtube_video_search(self, query: str, *, use_cache: bool = True, timeout: float = None) -> YoutubeVideo:
+        response = await self._api_request(
+            "youtube/searchvideo", {"query": str(query)}, use_cache = use_cache, deadline = self._deadline(timeout)
+        )
         return YoutubeVideo(response)
 
-    async def safe_note(self, note: str) -> str:
-        response = await self._api_request("safenote", {"note": str(note)})
+    async def safe_note(self, note: str, *, timeout: float = None) -> str:
+        response = await self._api_request("safenote", {"note": str(note)}, deadline = self._deadline(timeout))
         return str(response['url'])
 
-    async def encode(self, text: str) -> str:
-        response = await self._api_request("encode", {"text": str(text)})
+    async def encode(self, text: str, *, timeout: float = None) -> str:
+        response = await self._api_request("encode", {"text": str(text)}, deadline = self._deadline(timeout))
         return response['encoded']
 
-    async def decode(self, text: str) -> str:
-        response = await self._api_request("decode", {"text": str(text)})
+    async def decode(self, text: str, *, timeout: float = None) -> str:
+        response = await self._api_request("decode", {"text": str(text)}, deadline = self._deadline(timeout))
         return response['decoded']
 
-    async def reverse_text(self, text: str) -> str:
-        response = await self._api_request("reverse", {"text": str(text)})
+    async def reverse_text(self, text: str, *, timeout: float = None) -> str:
+        response = await self._api_request("reverse", {"text": str(text)}, deadline = self._deadline(timeout))
         return response['reversed']
 
-    async def image_search(self, query: str) -> Image:
-        response = await self._api_request("image-search", {"query": str(query)})
-        image_response = await self._session.request(response['image'])
-        return Image(str(image_response.url), image_response)
+    async def image_search(self, query: str, *, timeout: float = None) -> Image:
+        deadline = self._deadline(timeout)
+        response = await self._api_request("image-search", {"query": str(query)}, deadline = deadline)
+        return await self._image(response['image'], deadline, timeout)
 
-    async def random_emoji(self, category: int = None, *, nsfw: bool = False) -> RandomEmoji:
+    async def random_emoji(self, category: int = None, *, nsfw: bool = False, timeout: float = None) -> RandomEmoji:
         params = {}
         if category:
             params["category"] = int(category)
         if category:
             params["nsfw"] = True
-        response = await self._api_request("randomemoji", params)
+        deadline = self._deadline(timeout)
+        response = await self._api_request("randomemoji", params, deadline = deadline)
         params = dict(response)
         params['nsfw'] = nsfw
-        image_response = await self._session.request(response['image'])
-        return RandomEmoji(image_response, params)
+        image = await self._image(response['image'], deadline, timeout)
+        return RandomEmoji(image, params)
+
+    async def has_voted_on_topgg(
+        self, bot_id: int, user_id: int, top_gg_token: str, *, use_cache: bool = True, timeout: float = None
+    ) -> bool:
+        index = self._vote_index
+        if index is not None and use_cache:
+            voted = index.get(bot_id, user_id)
+            if voted is not None:
+                return voted
 
-    async def has_voted_on_topgg(self, bot_id: int, user_id: int, top_gg_token: str) -> bool:
         response = await self._api_request(
             "topgg/hasvoted", {
                 "bot": int(bot_id),
                 "user": int(user_id),
                 "token": str(top_gg_token)
-            }
+            },
+            deadline = self._deadline(timeout)
         )
         has_voted = response['voted']
-        return True if str(has_voted) == "true" else False
+        voted = has_voted is True or str(has_voted).lower() == "true"
+        if index is not None:
+            index.set(bot_id, user_id, voted)
+        return voted
+
+    async def have_voted(
+        self,
+        bot_id: int,
+        user_ids: Iterable[int],
+        top_gg_token: str,
+        *,
+        concurrency: int = 10,
+        use_cache: bool = True,
+        timeout: float = None,
+        return_exceptions: bool = False
+    ) -> Dict[int, Union[bool, Exception]]:
+        index = self._vote_index
+        # in the order of the input
+        results = dict.fromkeys(int(user_id) for user_id in user_ids)
+        unknown = []
+        for user_id in results:
+            voted = index.get(bot_id, user_id) if index is not None and use_cache else None
+            if voted is None:
+                unknown.append(user_id)
+            else:
+                results[user_id] = voted
+
+        checks = self._many(partial(self._has_voted, bot_id, top_gg_token, timeout), unknown, concurrency, False)
+        try:
+            async for user_id, voted in checks:
+                if isinstance(voted, Exception) and not return_exceptions:
+                    raise voted
+                results[user_id] = voted
+        finally:
+            # stops the other checks when one failed
+            await checks.aclose()
+        return results
+
+    async def _has_voted(self, bot_id: int, top_gg_token: str, timeout: Optional[float], user_id: int) -> bool:
+        return await self.has_voted_on_topgg(bot_id, user_id, top_gg_token, use_cache = False, timeout = timeout)
 
     # Session
 
+    async def prewarm(self, connections: int = None) -> int:
+        if self._router is None:
+            return await self._session.prewarm(self._api_url, connections)
+
+        opened = await asyncio.gather(*(self._session.prewarm(url, connections) for url in self._router.urls))
+        return sum(opened)
+
+    def pool_stats(self) -> dict:
+        return self._session.pool_stats()
+
     async def close(self) -> None:
+        if self._revalidate is not None:
+            for task in list(self._revalidate.pending.values()):
+                task.cancel()
         await self._session.close()
@@ -1,5 +1,9 @@
 # source: https://github.com/BlistBotList/blist-wrapper/blob/bc0c0fe9afbea39993ccfa8b6d633c2b5be634c8/blist/errors.py
-import aiohttp
+import asyncio
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiohttp
 
 
 class NormalAPIException(Exception):
@@ -22,8 +26,42 @@ class Forbidden(NormalAPIException):
     pass
 
 
+class TooManyRequests(NormalAPIException):
+    def __init__(self, message: str = None, *, retry_after: float = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ServiceUnavailable(NormalAPIException):
+    def __init__(self, message: str = None, *, retry_after: float = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(NormalAPIException):
+    def __init__(self, endpoint: str, *, retry_after: float = None) -> None:
+        super().__init__(f"Circuit for {endpoint} is open, it failed too often")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(NormalAPIException, asyncio.TimeoutError):
+    # also an asyncio.TimeoutError, so code that already handles timeouts keeps working
+    def __init__(self, message: str = "The call didn't finish before its deadline") -> None:
+        super().__init__(message)
+
+
+class ImageTooLarge(NormalAPIException):
+    def __init__(self, url: str, size: int, max_size: int) -> None:
+        super().__init__(f"Image at {url} is larger than {max_size} bytes")
+        self.url = url
+        self.size = size
+        self.max_size = max_size
+
+
 class HTTPException(NormalAPIException):
     def __init__(self, response, message):
+        super().__init__(message)
         self.response = response
         self.status = response.status
         self.message = message
@@ -36,7 +74,7 @@ class _WrapperError:
         self.text = text
 
 
-async def _get_error(response: aiohttp.ClientResponse) -> _WrapperError:
+async def _get_error(response: "aiohttp.ClientResponse") -> _WrapperError:
     if response.content_type == "application/json":
         return _WrapperError(await response.json())
 
@@ -1,21 +1,183 @@
-import aiohttp
+import asyncio
+import sys
+import time
+from typing import TYPE_CHECKING, Awaitable, List, Optional, TypeVar
+
+from .errors import DeadlineExceeded
+
+if TYPE_CHECKING:
+    import aiohttp
+
+T = TypeVar("T")
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    # Seconds left until a time.monotonic() deadline
+    if deadline is None:
+        return None
+
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded()
+    return left
+
+
+def is_connection_error(error: Optional[BaseException], *, connecting: bool = False) -> bool:
+    # connecting: only errors while connecting, the request never reached the server.
+    # aiohttp is only imported when the first session is created, before that none of its errors can happen.
+    aiohttp = sys.modules.get("aiohttp")
+    if aiohttp is None:
+        return False
+    return isinstance(error, aiohttp.ClientConnectorError if connecting else aiohttp.ClientConnectionError)
+
+
+async def wait_until(awaitable: Awaitable[T], deadline: Optional[float]) -> T:
+    # Cancels the awaitable when the deadline passes, timeouts from inside it after the deadline become DeadlineExceeded
+    if deadline is None:
+        return await awaitable
+
+    try:
+        left = remaining(deadline)
+    except DeadlineExceeded:
+        close = getattr(awaitable, "close", None)
+        if close is not None:
+            close()
+        raise
+
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError as exc:
+        if isinstance(exc, DeadlineExceeded) or time.monotonic() < deadline:
+            raise
+        raise DeadlineExceeded() from exc
+
+
+class HTTPConfig:
+    __slots__ = (
+        "limit",
+        "limit_per_host",
+        "keepalive_timeout",
+        "use_dns_cache",
+        "ttl_dns_cache",
+        "total_timeout",
+        "connect_timeout",
+        "read_timeout",
+        "prewarm_connections",
+    )
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15.0,
+        use_dns_cache: bool = True,
+        ttl_dns_cache: Optional[int] = 10,
+        total_timeout: Optional[float] = 300.0,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        prewarm_connections: int = 0,
+    ) -> None:
+        self.limit: int = limit
+        self.limit_per_host: int = limit_per_host
+        self.keepalive_timeout: float = keepalive_timeout
+        self.use_dns_cache: bool = use_dns_cache
+        self.ttl_dns_cache: Optional[int] = ttl_dns_cache
+        self.total_timeout: Optional[float] = total_timeout
+        self.connect_timeout: Optional[float] = connect_timeout
+        self.read_timeout: Optional[float] = read_timeout
+        self.prewarm_connections: int = prewarm_connections
+
+    def __repr__(self):
+        return "<HTTPConfig limit={0.limit} limit_per_host={0.limit_per_host} " \
+               "keepalive_timeout={0.keepalive_timeout} total_timeout={0.total_timeout}>".format(self)
+
+    def create_connector(self) -> "aiohttp.TCPConnector":
+        import aiohttp
+
+        return aiohttp.TCPConnector(
+            limit = self.limit,
+            limit_per_host = self.limit_per_host,
+            keepalive_timeout = self.keepalive_timeout,
+            use_dns_cache = self.use_dns_cache,
+            ttl_dns_cache = self.ttl_dns_cache,
+        )
+
+    def create_timeout(self, total: float = None) -> "aiohttp.ClientTimeout":
+        import aiohttp
+
+        if total is None or (self.total_timeout is not None and self.total_timeout < total):
+            total = self.total_timeout
+        return aiohttp.ClientTimeout(
+            total = total,
+            connect = self.connect_timeout,
+            sock_read = self.read_timeout,
+        )
 
 
 class HTTPSession:
-    __slots__ = ("session", "loop")
+    __slots__ = ("session", "loop", "config", "trace_configs")
 
-    def __init__(self):
+    def __init__(self, config: HTTPConfig = None, *, trace_configs: List["aiohttp.TraceConfig"] = None):
         self.session = None
+        self.config = config or HTTPConfig()
+        self.trace_configs = list(trace_configs or [])
 
-    # Aiohttp client sessions must be created in async functions
+    # Aiohttp client sessions must be created in async functions. aiohttp takes a while to import,
+    # so that only happens here, when the first request is made.
     async def create_session(self):
-        self.session = aiohttp.ClientSession()
+        import aiohttp
+
+        self.session = aiohttp.ClientSession(
+            connector = self.config.create_connector(),
+            timeout = self.config.create_timeout(),
+            trace_configs = self.trace_configs or None,
+        )
+
+    async def request(self, url, *, method = "get", deadline: float = None, **kwargs):
+        if deadline is not None:
+            # aiohttp's total timeout runs until the response is released, so it also limits reading the body
+            kwargs["timeout"] = self.config.create_timeout(remaining(deadline))
 
-    async def request(self, url, *, method = "get", **kwargs):
         if self.session is None:
             await self.create_session()
 
-        return await self.session.request(method, url, **kwargs)
+        try:
+            return await self.session.request(method, url, **kwargs)
+        except asyncio.TimeoutError as exc:
+            if deadline is None or isinstance(exc, DeadlineExceeded) or time.monotonic() < deadline:
+                raise
+            raise DeadlineExceeded() from exc
+
+    async def prewarm(self, url: str, count: int = None) -> int:
+        # Opens connections up front so the first requests don't pay for the TCP and TLS handshakes.
+        count = self.config.prewarm_connections if count is None else count
+        if count <= 0:
+            return 0
+
+        async def _open():
+            response = await self.request(url, method = "head")
+            response.release()
+
+        results = await asyncio.gather(*(_open() for _ in range(count)), return_exceptions = True)
+        return sum(1 for result in results if not isinstance(result, BaseException))
+
+    def pool_stats(self) -> dict:
+        connector = self.session.connector if self.session is not None else None
+        if connector is None or connector.closed:
+            return {"limit": self.config.limit, "limit_per_host": self.config.limit_per_host,
+                    "active": 0, "idle": 0, "waiting": 0}
+
+        # aiohttp has no public API for these, so read the connector's bookkeeping directly.
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        waiting = sum(len(waiters) for waiters in getattr(connector, "_waiters", {}).values())
+        return {
+            "limit": connector.limit,
+            "limit_per_host": connector.limit_per_host,
+            "active": len(getattr(connector, "_acquired", ())),
+            "idle": idle,
+            "waiting": waiting,
+        }
 
     async def close(self):
         if self.session is not None and not self.session.closed:
@@ -0,0 +1,333 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from os import PathLike
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+from .cache import CacheStats
+
+__all__ = ("ImageCache",)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class _ImageEntry:
+    __slots__ = ("url", "digest", "etag", "last_modified", "expires")
+
+    def __init__(
+        self, url: str, digest: str, etag: Optional[str], last_modified: Optional[str], expires: float
+    ) -> None:
+        self.url: str = url
+        self.digest: str = digest
+        self.etag: Optional[str] = etag
+        self.last_modified: Optional[str] = last_modified
+        # time.time(), so it means the same on disk after a restart
+        self.expires: float = expires
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "digest": self.digest,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "expires": self.expires,
+        }
+
+
+class ImageCache:
+    # Image bytes keyed by their SHA-256, so URLs with the same image share one copy, and a URL to hash index
+    # with the ETag and Last-Modified of the response. Bytes are kept in memory up to max_bytes (least recently
+    # used go first) and, with a directory, on disk up to max_disk_bytes. Images older than ttl seconds (or the
+    # response's max-age) are revalidated with a conditional request, a 304 keeps the cached bytes.
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        *,
+        max_item_size: int = 4 * 1024 * 1024,
+        max_entries: int = 10000,
+        ttl: float = 3600.0,
+        directory: Union[str, PathLike] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.max_bytes: int = max_bytes
+        self.max_item_size: int = max_item_size
+        self.max_entries: int = max_entries
+        self.ttl: float = ttl
+        self.directory: Optional[str] = str(directory) if directory is not None else None
+        self.max_disk_bytes: int = max_disk_bytes
+        self.stats: CacheStats = CacheStats()
+        self.revalidations: int = 0
+        self.not_modified: int = 0
+        # writes to the directory that failed, e.g. because the disk is full, those images are only kept in memory
+        self.disk_errors: int = 0
+        self._entries: "OrderedDict[str, _ImageEntry]" = OrderedDict()
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes: int = 0
+        self._disk_bytes: Optional[int] = None
+
+    def __repr__(self):
+        return "<ImageCache max_bytes={0.max_bytes} memory_bytes={0.memory_bytes} " \
+               "directory={0.directory}>".format(self)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> Optional[int]:
+        return self._disk_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Disk, every function here runs in the loop's default executor
+
+    async def _run(self, function, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, function, *args)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _entry_path(self, url: str) -> str:
+        name = _sha256(url.encode("utf-8"))
+        return os.path.join(self.directory, "urls", name[:2], f"{name}.json")
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        # write and rename, other processes never see half a file. A name of its own, threads of this process
+        # may write the same file at the same time.
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary, "xb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except OSError:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+
+    def _disk_usage(self) -> int:
+        total = 0
+        for root, _, files in os.walk(os.path.join(self.directory, "blobs")):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+
+    def _disk_load(self, url: str) -> Optional[Tuple[_ImageEntry, bytes]]:
+        try:
+            with open(self._entry_path(url), "rb") as file:
+                data = json.loads(file.read())
+            path = self._blob_path(data["digest"])
+            with open(path, "rb") as file:
+                body = file.read()
+            # the modification time is the last use, eviction removes the oldest first
+            os.utime(path)
+            entry = _ImageEntry(data["url"], data["digest"], data["etag"], data["last_modified"], data["expires"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return entry, body
+
+    def _disk_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), "rb") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def _disk_store(self, entry: _ImageEntry, body: Optional[bytes]) -> int:
+        added = 0
+        if body is not None:
+            path = self._blob_path(entry.digest)
+            if not os.path.exists(path):
+                self._write_file(path, body)
+                added = len(body)
+        self._write_file(self._entry_path(entry.url), json.dumps(entry.to_dict()).encode("utf-8"))
+        return added
+
+    def _disk_evict(self, target: int) -> Tuple[int, int]:
+        blobs = []
+        for root, _, files in os.walk(os.path.join(self.directory, "blobs")):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                blobs.append((info.st_mtime, info.st_size, path))
+
+        total = sum(size for _, size, _ in blobs)
+        removed = 0
+        for _, size, path in sorted(blobs):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return total, removed
+
+    def _disk_delete(self, url: str) -> None:
+        try:
+            os.remove(self._entry_path(url))
+        except OSError:
+            pass
+
+    # Memory
+
+    def _remember(self, entry: _ImageEntry, body: bytes) -> None:
+        self._entries[entry.url] = entry
+        self._entries.move_to_end(entry.url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last = False)
+
+        if entry.digest in self._blobs:
+            self._blobs.move_to_end(entry.digest)
+            return
+        if len(body) > self.max_bytes:
+            return
+
+        self._blobs[entry.digest] = body
+        self._memory_bytes += len(body)
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._blobs.popitem(last = False)
+            self._memory_bytes -= len(evicted)
+            self.stats.evictions += 1
+
+    def _expires(self, headers: Mapping[str, str]) -> Optional[float]:
+        # None means it may not be stored
+        cache_control = (headers.get("Cache-Control") or "").lower()
+        if "no-store" in cache_control:
+            return None
+        if "no-cache" in cache_control:
+            return time.time()
+
+        match = _MAX_AGE.search(cache_control)
+        return time.time() + (int(match.group(1)) if match else self.ttl)
+
+    # Public
+
+    async def lookup(self, url: str) -> Optional[Tuple[_ImageEntry, bytes]]:
+        # The entry and bytes of the URL, also when it needs revalidating (check entry.fresh)
+        entry = self._entries.get(url)
+        body = self._blobs.get(entry.digest) if entry is not None else None
+        if body is None and self.directory is not None:
+            loaded = await self._run(self._disk_load, url)
+            if loaded is not None:
+                entry, body = loaded
+                self._remember(entry, body)
+        elif body is not None:
+            self._entries.move_to_end(url)
+            self._blobs.move_to_end(entry.digest)
+
+        if body is None:
+            if entry is not None:
+                del self._entries[url]
+            self.stats.misses += 1
+            return None
+
+        # hits are the images served without any request
+        if entry.fresh:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            self.revalidations += 1
+        return entry, body
+
+    async def get(self, url: str) -> Optional[bytes]:
+        # Cached bytes of the URL, None if missing or expired
+        cached = await self.lookup(url)
+        if cached is None or not cached[0].fresh:
+            return None
+        return cached[1]
+
+    async def get_by_hash(self, digest: str) -> Optional[bytes]:
+        body = self._blobs.get(digest)
+        if body is None and self.directory is not None:
+            body = await self._run(self._disk_blob, digest)
+        return body
+
+    async def set(self, url: str, body: bytes, headers: Mapping[str, str] = None) -> Optional[str]:
+        # Returns the SHA-256 of the bytes, None if they weren't stored
+        headers = headers or {}
+        expires = self._expires(headers)
+        if expires is None or len(body) > self.max_item_size:
+            return None
+
+        digest = _sha256(body)
+        if digest in self._blobs:
+            # same bytes as another URL, share the copy that's already kept
+            body = self._blobs[digest]
+        entry = _ImageEntry(url, digest, headers.get("ETag"), headers.get("Last-Modified"), expires)
+        self._remember(entry, body)
+
+        if self.directory is not None:
+            try:
+                if self._disk_bytes is None:
+                    self._disk_bytes = await self._run(self._disk_usage)
+                self._disk_bytes += await self._run(self._disk_store, entry, body)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._disk_bytes, removed = await self._run(self._disk_evict, int(self.max_disk_bytes * 0.9))
+                    self.stats.evictions += removed
+            except OSError:
+                # a full or read-only directory, the image is only kept in memory
+                self.disk_errors += 1
+        return digest
+
+    async def revalidated(self, url: str, headers: Mapping[str, str] = None) -> None:
+        # The server answered 304 Not Modified, the cached bytes are fresh again
+        self.not_modified += 1
+        entry = self._entries.get(url)
+        if entry is None:
+            return
+
+        headers = headers or {}
+        expires = self._expires(headers)
+        entry.expires = expires if expires is not None else time.time()
+        entry.etag = headers.get("ETag") or entry.etag
+        entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+        if self.directory is not None:
+            try:
+                await self._run(self._disk_store, entry, None)
+            except OSError:
+                self.disk_errors += 1
+
+    async def delete(self, url: str) -> None:
+        self._entries.pop(url, None)
+        if self.directory is not None:
+            await self._run(self._disk_delete, url)
+
+    def clear(self) -> None:
+        # memory only, delete the directory to clear the disk
+        self._entries.clear()
+        self._blobs.clear()
+        self._memory_bytes = 0
@@ -0,0 +1,130 @@
+import base64
+import binascii
+from typing import Callable, Dict, Iterable, List
+
+from .classes import Emojified, ParsedMS
+from .errors import BadRequest
+
+# Computes the deterministic endpoints in-process, the returned dicts have the same keys as the API's responses.
+
+_DIGITS = ("zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine")
+_SYMBOLS = {"!": ":exclamation:", "?": ":question:", "#": ":hash:", "*": ":asterisk:"}
+
+
+def _trunc_divmod(value: int, divisor: int):
+    # JavaScript style: both rounded towards zero and with the sign of value
+    quotient, remainder = divmod(abs(value), divisor)
+    if value < 0:
+        return -quotient, -remainder
+    return quotient, remainder
+
+
+def _ordinal(number: int) -> str:
+    number = int(number)
+    last_two = abs(number) % 100
+    if 11 <= last_two <= 13:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(last_two % 10, "th")
+    return f"{number}{suffix}"
+
+
+def ordinal(num: int) -> dict:
+    return {"ordinal": _ordinal(num)}
+
+
+def reverse(text: str) -> dict:
+    text = str(text)
+    return {"text": text, "reversed": text[::-1]}
+
+
+def parsems(ms: int) -> dict:
+    # same fields and rounding as the parse-ms package
+    ms = int(ms)
+    days = _trunc_divmod(ms, 86400000)[0]
+    hours = _trunc_divmod(_trunc_divmod(ms, 3600000)[0], 24)[1]
+    minutes = _trunc_divmod(_trunc_divmod(ms, 60000)[0], 60)[1]
+    seconds = _trunc_divmod(_trunc_divmod(ms, 1000)[0], 60)[1]
+    milliseconds = _trunc_divmod(ms, 1000)[1]
+    return {
+        "days": days,
+        "hours": hours,
+        "minutes": minutes,
+        "seconds": seconds,
+        "milliseconds": milliseconds,
+        "microseconds": 0,
+        "nanoseconds": 0,
+    }
+
+
+def encode(text: str) -> dict:
+    text = str(text)
+    return {"text": text, "encoded": base64.b64encode(text.encode("utf-8")).decode("ascii")}
+
+
+def decode(text: str) -> dict:
+    text = str(text)
+    try:
+        decoded = base64.b64decode(text.encode("ascii"))
+    except (binascii.Error, UnicodeEncodeError) as exc:
+        raise BadRequest(f"Invalid base64: {text!r}") from exc
+    return {"text": text, "decoded": decoded.decode("utf-8", "replace")}
+
+
+def _emoji(character: str) -> str:
+    if "a" <= character <= "z":
+        return f":regional_indicator_{character}:"
+    if "0" <= character <= "9":
+        return f":{_DIGITS[ord(character) - 48]}:"
+    if character.isspace():
+        return ""
+    return _SYMBOLS.get(character, character)
+
+
+def emojify(text: str) -> dict:
+    text = str(text)
+    return {"text": text, "emojify": " ".join(_emoji(character) for character in text.lower())}
+
+
+ENDPOINTS: Dict[str, Callable[..., dict]] = {
+    "ordinal": ordinal,
+    "reverse": reverse,
+    "parsems": parsems,
+    "encode": encode,
+    "decode": decode,
+    "emojify": emojify,
+}
+
+# What Client(local = True) computes. The output of encode, decode and emojify here doesn't match the API's (the
+# emoji mapping is an approximation), they're only used when asked for by name.
+DEFAULT_ENDPOINTS = frozenset({"ordinal", "reverse", "parsems"})
+
+
+def compute(endpoint: str, params: dict = None) -> dict:
+    return ENDPOINTS[endpoint](**(params or {}))
+
+
+# Batch variants, these return the same as the client methods would for each input.
+
+def ordinals(numbers: Iterable[int]) -> List[str]:
+    return [_ordinal(number) for number in numbers]
+
+
+def reverse_texts(texts: Iterable[str]) -> List[str]:
+    return [str(text)[::-1] for text in texts]
+
+
+def parse_milliseconds_many(values: Iterable[int]) -> List[ParsedMS]:
+    return [ParsedMS(parsems(value)) for value in values]
+
+
+def encode_many(texts: Iterable[str]) -> List[str]:
+    return [encode(text)["encoded"] for text in texts]
+
+
+def decode_many(texts: Iterable[str]) -> List[str]:
+    return [decode(text)["decoded"] for text in texts]
+
+
+def emojify_many(texts: Iterable[str]) -> List[Emojified]:
+    return [Emojified(emojify(text)) for text in texts]
@@ -0,0 +1,210 @@
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+__all__ = ("Histogram", "Instrumentation")
+
+PHASES = ("total", "queue", "dns", "connect", "ttfb", "body", "decode")
+
+
+class Histogram:
+    # HDR style: log2 buckets split into 16 linear sub buckets, so every recorded
+    # value is within ~6% of its bucket. Values are stored as whole microseconds.
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    SUB_BUCKET_BITS = 5
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        shift = max(value.bit_length() - cls.SUB_BUCKET_BITS, 0)
+        return (shift << (cls.SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+    @classmethod
+    def _lowest(cls, index: int) -> int:
+        half = 1 << (cls.SUB_BUCKET_BITS - 1)
+        if index < 2 * half:
+            return index
+        shift = index // half - 1
+        return (index - shift * half) << shift
+
+    def record(self, seconds: float) -> None:
+        index = self._index(max(int(seconds * 1e6), 0))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        target = max(1, int(round(self.count * percent / 100)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                middle = (self._lowest(index) + self._lowest(index + 1)) / 2
+                return min(max(middle / 1e6, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        # milliseconds, easier to read than seconds for request latencies
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            "count": self.count,
+            "min": ms(self.min),
+            "mean": ms(self.total / self.count) if self.count else None,
+            "p50": ms(self.percentile(50)),
+            "p90": ms(self.percentile(90)),
+            "p99": ms(self.percentile(99)),
+            "p999": ms(self.percentile(99.9)),
+            "max": ms(self.max),
+        }
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "attempts", "cache_hits", "coalesced", "errors", "phases")
+
+    def __init__(self) -> None:
+        self.requests: int = 0
+        self.attempts: int = 0
+        self.cache_hits: int = 0
+        self.coalesced: int = 0
+        self.errors: Dict[str, int] = {}
+        self.phases: Dict[str, Histogram] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Histogram()
+        histogram.record(seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "errors": dict(self.errors),
+            "phases": {phase: self.phases[phase].to_dict() for phase in PHASES if phase in self.phases},
+        }
+
+
+class RequestTimer:
+    # Timestamps of one request attempt, filled in by the client and the aiohttp trace callbacks.
+    __slots__ = ("endpoint", "started", "phases", "_marks")
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint: str = endpoint
+        self.started: float = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._marks: Dict[str, float] = {}
+
+    def start(self, phase: str) -> None:
+        self._marks[phase] = time.perf_counter()
+
+    def end(self, phase: str) -> None:
+        started = self._marks.pop(phase, None)
+        if started is not None:
+            self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - started
+
+
+class Instrumentation:
+    # Collects per endpoint counters and latency histograms. Listeners are called with the event name and a dict.
+    # Events: "request_end" (endpoint, duration, error, attempts), "attempt_end" (endpoint, status, phases),
+    # "cache_hit" (endpoint) and "coalesced" (endpoint).
+
+    def __init__(self) -> None:
+        self._endpoints: Dict[str, _EndpointStats] = {}
+        self._listeners: Dict[str, List[Callable[[str, dict], None]]] = {}
+
+    def _stats(self, endpoint: str) -> _EndpointStats:
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = _EndpointStats()
+        return stats
+
+    def add_listener(self, event: str, callback: Callable[[str, dict], None]) -> None:
+        self._listeners.setdefault(event, []).append(callback)
+
+    def remove_listener(self, event: str, callback: Callable[[str, dict], None]) -> None:
+        listeners = self._listeners.get(event, [])
+        if callback in listeners:
+            listeners.remove(callback)
+
+    def _dispatch(self, event: str, data: dict) -> None:
+        for callback in self._listeners.get(event, ()):
+            callback(event, data)
+
+    def cache_hit(self, endpoint: str) -> None:
+        self._stats(endpoint).cache_hits += 1
+        if "cache_hit" in self._listeners:
+            self._dispatch("cache_hit", {"endpoint": endpoint})
+
+    def coalesced(self, endpoint: str) -> None:
+        self._stats(endpoint).coalesced += 1
+        if "coalesced" in self._listeners:
+            self._dispatch("coalesced", {"endpoint": endpoint})
+
+    def attempt_end(self, timer: RequestTimer, status: Optional[int]) -> None:
+        stats = self._stats(timer.endpoint)
+        stats.attempts += 1
+        for phase, seconds in timer.phases.items():
+            stats.record(phase, seconds)
+        if "attempt_end" in self._listeners:
+            self._dispatch("attempt_end", {"endpoint": timer.endpoint, "status": status, "phases": dict(timer.phases)})
+
+    def request_end(self, endpoint: str, duration: float, error: BaseException = None, attempts: int = 1) -> None:
+        stats = self._stats(endpoint)
+        stats.requests += 1
+        stats.record("total", duration)
+        if error is not None:
+            name = type(error).__name__
+            stats.errors[name] = stats.errors.get(name, 0) + 1
+        if "request_end" in self._listeners:
+            self._dispatch("request_end", {
+                "endpoint": endpoint, "duration": duration, "error": error, "attempts": attempts
+            })
+
+    def snapshot(self) -> dict:
+        return {endpoint: stats.to_dict() for endpoint, stats in self._endpoints.items()}
+
+    def reset(self) -> None:
+        self._endpoints.clear()
+
+    def trace_config(self) -> "aiohttp.TraceConfig":
+        # The client passes a RequestTimer as trace_request_ctx, other requests (like images) are ignored.
+        def phase(name: str, end: bool):
+            async def callback(session, context, params):
+                timer = context.trace_request_ctx
+                if isinstance(timer, RequestTimer):
+                    timer.end(name) if end else timer.start(name)
+
+            return callback
+
+        import aiohttp
+
+        config = aiohttp.TraceConfig()
+        config.on_connection_queued_start.append(phase("queue", False))
+        config.on_connection_queued_end.append(phase("queue", True))
+        config.on_dns_resolvehost_start.append(phase("dns", False))
+        config.on_dns_resolvehost_end.append(phase("dns", True))
+        config.on_connection_create_start.append(phase("connect", False))
+        config.on_connection_create_end.append(phase("connect", True))
+        config.on_request_start.append(phase("ttfb", False))
+        config.on_request_end.append(phase("ttfb", True))
+        return config
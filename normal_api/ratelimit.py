@@ -0,0 +1,261 @@
+import asyncio
+import itertools
+import random
+import time
+from heapq import heappop, heappush
+from typing import Dict, Optional, Tuple, Union
+
+from .errors import HTTPException, ServiceUnavailable, TooManyRequests
+from .http import is_connection_error
+
+__all__ = ("TokenBucket", "RateLimiter", "RetryPolicy", "DEFAULT_PRIORITIES")
+
+# Lower runs first. Interactive lookups go before bulk jobs.
+DEFAULT_PRIORITIES = {
+    "userstatus": 0,
+    "inviteinfo": 1,
+    "templateinfo": 1,
+    "translate": 10,
+    "youtube/searchvideo": 10,
+    "image-search": 10,
+}
+DEFAULT_PRIORITY = 5
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # Retry-After can also be a HTTP date, rarely used so email.utils is only imported for it
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "_updated")
+
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+
+        self.rate: float = float(rate)
+        self.capacity: float = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self.tokens: float = self.capacity
+        self._updated: float = time.monotonic()
+
+    def __repr__(self):
+        return "<TokenBucket rate={0.rate} capacity={0.capacity} tokens={0.tokens:.2f}>".format(self)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, now: float = None) -> float:
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate: float = None,
+        *,
+        burst: float = None,
+        endpoint_rates: Dict[str, Union[float, Tuple[float, float]]] = None,
+        priorities: Dict[str, int] = None,
+    ) -> None:
+        self._global: Optional[TokenBucket] = TokenBucket(rate, burst) if rate else None
+        self._buckets: Dict[str, TokenBucket] = {}
+        for endpoint, limit in (endpoint_rates or {}).items():
+            self._buckets[endpoint] = TokenBucket(*limit) if isinstance(limit, tuple) else TokenBucket(limit)
+
+        self.priorities: Dict[str, int] = dict(DEFAULT_PRIORITIES if priorities is None else priorities)
+        self._queues: Dict[str, list] = {}
+        self._paused: Dict[Optional[str], float] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Future] = None
+        self.acquired: int = 0
+        self.delayed: int = 0
+
+    def _delay(self, endpoint: str, now: float) -> float:
+        delay = max(self._paused.get(endpoint, 0.0), self._paused.get(None, 0.0)) - now
+        bucket = self._buckets.get(endpoint)
+        if bucket is not None:
+            delay = max(delay, bucket.delay(now))
+        if self._global is not None:
+            delay = max(delay, self._global.delay(now))
+        return max(delay, 0.0)
+
+    def _take(self, endpoint: str) -> None:
+        bucket = self._buckets.get(endpoint)
+        if bucket is not None:
+            bucket.take()
+        if self._global is not None:
+            self._global.take()
+        self.acquired += 1
+
+    async def acquire(self, endpoint: str, priority: int = None) -> None:
+        if not self._queues and self._delay(endpoint, time.monotonic()) <= 0:
+            self._take(endpoint)
+            return
+
+        if priority is None:
+            priority = self.priorities.get(endpoint, DEFAULT_PRIORITY)
+
+        future = asyncio.get_event_loop().create_future()
+        heappush(self._queues.setdefault(endpoint, []), (priority, next(self._counter), future))
+        self.delayed += 1
+        self._wake()
+        await future
+
+    def _wake(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while True:
+            now = time.monotonic()
+            best = None
+            wait = None
+            for endpoint in list(self._queues):
+                queue = self._queues[endpoint]
+                # waiters that were cancelled are skipped
+                while queue and queue[0][2].done():
+                    heappop(queue)
+                if not queue:
+                    del self._queues[endpoint]
+                    continue
+
+                delay = self._delay(endpoint, now)
+                if delay > 0:
+                    wait = delay if wait is None else min(wait, delay)
+                elif best is None or queue[0] < self._queues[best][0]:
+                    best = endpoint
+
+            if best is not None:
+                _, _, future = heappop(self._queues[best])
+                self._take(best)
+                future.set_result(None)
+                continue
+
+            if not self._queues:
+                return
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def pause(self, endpoint: str = None, seconds: float = 0.0) -> None:
+        # endpoint None pauses every endpoint
+        until = time.monotonic() + seconds
+        if until > self._paused.get(endpoint, 0.0):
+            self._paused[endpoint] = until
+        if self._queues:
+            self._wake()
+
+    def update(self, endpoint: str, headers) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+
+        try:
+            if float(remaining) > 0:
+                return
+        except ValueError:
+            return
+
+        reset_after = parse_retry_after(headers.get("X-RateLimit-Reset-After"))
+        if reset_after is None:
+            reset = parse_retry_after(headers.get("X-RateLimit-Reset"))
+            if reset is not None:
+                # either an unix timestamp or seconds from now
+                reset_after = max(0.0, reset - time.time()) if reset > 1e9 else reset
+
+        if reset_after:
+            self.pause(None if headers.get("X-RateLimit-Global") else endpoint, reset_after)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        if self._global is not None:
+            self._global.delay(now)
+        return {
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "queued": {endpoint: len(queue) for endpoint, queue in self._queues.items()},
+            "paused": {
+                endpoint or "*": round(until - now, 3) for endpoint, until in self._paused.items() if until > now
+            },
+            "global_tokens": round(self._global.tokens, 3) if self._global is not None else None,
+        }
+
+
+class RetryPolicy:
+    __slots__ = ("max_retries", "base_delay", "max_delay", "statuses")
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        *,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        statuses: Tuple[int, ...] = (429, 502, 503, 504),
+    ) -> None:
+        self.max_retries: int = max_retries
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.statuses: frozenset = frozenset(statuses)
+
+    def __repr__(self):
+        return "<RetryPolicy max_retries={0.max_retries} base_delay={0.base_delay} " \
+               "max_delay={0.max_delay}>".format(self)
+
+    def backoff(self, attempt: int) -> float:
+        # "full jitter" exponential backoff
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def get_delay(self, error: Exception, attempt: int, *, idempotent: bool = True) -> Optional[float]:
+        if attempt >= self.max_retries:
+            return None
+
+        if isinstance(error, TooManyRequests):
+            status = 429
+        elif isinstance(error, ServiceUnavailable):
+            status = 503
+        elif isinstance(error, HTTPException):
+            status = error.status
+        elif isinstance(error, asyncio.TimeoutError) or is_connection_error(error):
+            # the request may have been handled, only safe to repeat if it doesn't create anything
+            return self.backoff(attempt) if idempotent else None
+        else:
+            return None
+
+        if status not in self.statuses or (status not in (429, 503) and not idempotent):
+            return None
+
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is None:
+            return self.backoff(attempt)
+        if retry_after > self.max_delay:
+            return None
+        # a little jitter so waiting clients don't all retry at the same moment
+        return retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.05))
@@ -0,0 +1,147 @@
+import asyncio
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from .circuit import is_failure
+from .errors import DeadlineExceeded
+
+__all__ = ("Router",)
+
+
+def _normalize(url: str) -> str:
+    return url if url.endswith("/") else f"{url}/"
+
+
+class _Base:
+    __slots__ = ("url", "latency", "requests", "failures", "consecutive_failures", "down_until")
+
+    def __init__(self, url: str) -> None:
+        self.url: str = url
+        self.latency: Optional[float] = None
+        self.requests: int = 0
+        self.failures: int = 0
+        self.consecutive_failures: int = 0
+        self.down_until: float = 0.0
+
+
+class Router:
+    # Sends each request to the healthy base URL with the lowest average (EWMA) latency. A base that fails
+    # failure_threshold times in a row (5xx, timeouts, connection errors) is skipped for cooldown seconds,
+    # doubling up to max_cooldown while it keeps failing. Endpoints can be pinned to some of the bases.
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        *,
+        pinned: Dict[str, Union[str, Sequence[str]]] = None,
+        smoothing: float = 0.2,
+        explore: float = 0.05,
+        failure_threshold: int = 2,
+        cooldown: float = 5.0,
+        max_cooldown: float = 60.0,
+    ) -> None:
+        self._bases: Dict[str, _Base] = {}
+        for url in urls:
+            url = _normalize(url)
+            self._bases[url] = _Base(url)
+        if not self._bases:
+            raise ValueError("at least one base URL is needed")
+
+        self.pinned: Dict[str, List[str]] = {}
+        for endpoint, bases in (pinned or {}).items():
+            bases = [_normalize(bases)] if isinstance(bases, str) else [_normalize(base) for base in bases]
+            unknown = [base for base in bases if base not in self._bases]
+            if unknown:
+                raise ValueError(f"{endpoint} is pinned to unknown base URLs: {', '.join(unknown)}")
+            self.pinned[endpoint] = bases
+
+        self.smoothing: float = smoothing
+        # chance a request goes to a random healthy base, keeps the latencies of the others up to date
+        self.explore: float = explore
+        self.failure_threshold: int = max(1, failure_threshold)
+        self.cooldown: float = cooldown
+        self.max_cooldown: float = max_cooldown
+        self.failovers: int = 0
+        self._routes: Dict[str, Dict[str, int]] = {}
+
+    def __repr__(self):
+        return "<Router urls={0.urls} failure_threshold={0.failure_threshold} cooldown={0.cooldown}>".format(self)
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._bases)
+
+    def _candidates(self, endpoint: str, exclude: Sequence[str] = ()) -> List[_Base]:
+        urls = self.pinned.get(endpoint) or self._bases
+        return [self._bases[url] for url in urls if url not in exclude]
+
+    def has_alternative(self, endpoint: str, exclude: Sequence[str]) -> bool:
+        return bool(self._candidates(endpoint, exclude))
+
+    def choose(self, endpoint: str, exclude: Sequence[str] = ()) -> str:
+        candidates = self._candidates(endpoint, exclude) or self._candidates(endpoint)
+        now = time.monotonic()
+        healthy = [base for base in candidates if base.down_until <= now]
+        if not healthy:
+            # everything is down, use the one that comes back first
+            base = min(candidates, key = lambda base: base.down_until)
+        elif len(healthy) > 1 and self.explore and random.random() < self.explore:
+            base = random.choice(healthy)
+        else:
+            # bases without a measurement yet go first
+            base = min(healthy, key = lambda base: base.latency or 0.0)
+
+        routes = self._routes.get(endpoint)
+        if routes is None:
+            routes = self._routes[endpoint] = {}
+        routes[base.url] = routes.get(base.url, 0) + 1
+        return base.url
+
+    def _base_of(self, url: str) -> Optional[_Base]:
+        base = self._bases.get(url)
+        if base is not None:
+            return base
+        for base in self._bases.values():
+            if url.startswith(base.url):
+                return base
+        return None
+
+    def record(self, url: str, latency: float, error: BaseException = None) -> None:
+        # url is the base URL or a full request URL
+        base = self._base_of(url)
+        if base is None or isinstance(error, (asyncio.CancelledError, DeadlineExceeded)):
+            return
+
+        base.requests += 1
+        if is_failure(error):
+            base.failures += 1
+            base.consecutive_failures += 1
+            if base.consecutive_failures >= self.failure_threshold:
+                extra = min(base.consecutive_failures - self.failure_threshold, 16)
+                base.down_until = time.monotonic() + min(self.cooldown * 2 ** extra, self.max_cooldown)
+            return
+
+        base.consecutive_failures = 0
+        base.down_until = 0.0
+        if base.latency is None:
+            base.latency = latency
+        else:
+            base.latency += (latency - base.latency) * self.smoothing
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "bases": {
+                url: {
+                    "latency": round(base.latency * 1000, 3) if base.latency is not None else None,
+                    "healthy": base.down_until <= now,
+                    "down_for": round(max(0.0, base.down_until - now), 3),
+                    "requests": base.requests,
+                    "failures": base.failures,
+                }
+                for url, base in self._bases.items()
+            },
+            "routes": {endpoint: dict(routes) for endpoint, routes in self._routes.items()},
+            "failovers": self.failovers,
+        }
@@ -0,0 +1,448 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from os import PathLike
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .cache import BaseCache, ResponseCache
+from .ratelimit import RateLimiter
+from .utils import from_json
+
+__all__ = ("Coordinator", "SharedRateLimiter", "SharedCache")
+
+# one JSON message per line, cache values can be large
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators = (",", ":")).encode("utf-8") + b"\n"
+
+
+class Coordinator:
+    # Keeps the rate limits and response cache of every process on a host, the processes talk to it over a Unix
+    # socket with SharedRateLimiter and SharedCache. Run it in one process with start(), or on its own with
+    # python -m normal_api.shared --socket /run/normal_api.sock --rate 20
+    # Rate limit waits are handed out in order, each acquire reserves the next free slot of the budget.
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        *,
+        rate: float = None,
+        burst: float = None,
+        endpoint_rates: Dict[str, Union[float, Tuple[float, float]]] = None,
+        max_entries: int = 10000,
+    ) -> None:
+        self.path: str = str(path)
+        self.ratelimiter: RateLimiter = RateLimiter(rate, burst = burst, endpoint_rates = endpoint_rates)
+        self.cache: ResponseCache = ResponseCache(max_entries, ttls = {})
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: set = set()
+        self._handlers = {
+            "acquire": self._acquire,
+            "pause": self._pause,
+            "get": self._get,
+            "set": self._set,
+            "delete": self._delete,
+            "clear": self._clear,
+            "stats": self._stats,
+        }
+
+    def __repr__(self):
+        return "<Coordinator path={0.path} connections={0.connections}>".format(self)
+
+    @property
+    def connections(self) -> int:
+        return len(self._writers)
+
+    async def _acquire(self, endpoint: str) -> float:
+        limiter = self.ratelimiter
+        delay = limiter._delay(endpoint, time.monotonic())
+        # taken now, the buckets go below zero so the next process waits for the slot after this one
+        limiter._take(endpoint)
+        if delay > 0:
+            limiter.delayed += 1
+        return delay
+
+    async def _pause(self, endpoint: Optional[str], seconds: float) -> None:
+        self.ratelimiter.pause(endpoint, seconds)
+
+    async def _get(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = await self.cache.get_entry(key)
+        if entry is None or entry[1] <= 0:
+            self.cache.stats.misses += 1
+        else:
+            self.cache.stats.hits += 1
+        return entry
+
+    async def _set(self, key: str, value: Any, ttl: float, stale: float = 0.0) -> None:
+        await self.cache.set(key, value, ttl, stale = stale)
+
+    async def _delete(self, key: str) -> bool:
+        return await self.cache.delete(key)
+
+    async def _clear(self) -> None:
+        await self.cache.clear()
+
+    async def _stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "ratelimiter": self.ratelimiter.stats(),
+            "cache": {"entries": len(self.cache), **self.cache.stats.to_dict()},
+        }
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+
+                message = from_json(line)
+                try:
+                    reply = {"id": message["id"], "result": await self._handlers[message["op"]](**message["args"])}
+                except Exception as exc:
+                    reply = {"id": message.get("id"), "error": f"{type(exc).__name__}: {exc}"}
+                writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _running(self) -> bool:
+        try:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        except OSError:
+            return False
+        writer.close()
+        return True
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            if await self._running():
+                raise RuntimeError(f"A coordinator is already running at {self.path}")
+            # left behind by one that died
+            os.remove(self.path)
+
+        self._server = await asyncio.start_unix_server(self._serve, path = self.path, limit = _LINE_LIMIT)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            # Server.serve_forever() is 3.7+, the server accepts connections on its own until it's closed
+            await asyncio.get_event_loop().create_future()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+
+        self._server.close()
+        # the server only stops listening, the processes that are connected have to be disconnected too
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class _Channel:
+    # The connection of one process to the coordinator, calls are sent without waiting for the previous reply.
+    # Raises ConnectionError when the coordinator can't be reached, connecting isn't tried again for
+    # retry_interval seconds after that.
+
+    __slots__ = ("path", "timeout", "retry_interval", "_writer", "_reader_task", "_pending", "_ids", "_lock",
+                 "_down_until")
+
+    def __init__(self, path: str, timeout: float, retry_interval: float) -> None:
+        self.path: str = path
+        self.timeout: float = timeout
+        self.retry_interval: float = retry_interval
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Future] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._lock: Optional[asyncio.Lock] = None
+        self._down_until: float = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._writer is not None:
+                return
+            if time.monotonic() < self._down_until:
+                raise ConnectionError(f"The coordinator at {self.path} is unavailable")
+
+            try:
+                if not hasattr(asyncio, "open_unix_connection"):
+                    raise OSError("Unix sockets aren't supported on this platform")
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.path, limit = _LINE_LIMIT), self.timeout
+                )
+            except (OSError, asyncio.TimeoutError) as exc:
+                self._down_until = time.monotonic() + self.retry_interval
+                raise ConnectionError(f"Can't connect to the coordinator at {self.path}") from exc
+
+            self._writer = writer
+            self._reader_task = asyncio.ensure_future(self._read(reader, writer))
+
+    async def _read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                message = from_json(line)
+                future = self._pending.pop(message["id"], None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(RuntimeError(f"The coordinator failed: {message['error']}"))
+                else:
+                    future.set_result(message["result"])
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if self._writer is writer:
+                self._disconnect()
+
+    def _disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._down_until = time.monotonic() + self.retry_interval
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Lost the connection to the coordinator at {self.path}"))
+
+    async def call(self, op: str, **args) -> Any:
+        if self._writer is None:
+            await self._connect()
+        writer = self._writer
+        if writer is None:
+            raise ConnectionError(f"Lost the connection to the coordinator at {self.path}")
+
+        call_id = next(self._ids)
+        future = asyncio.get_event_loop().create_future()
+        self._pending[call_id] = future
+        try:
+            writer.write(_encode({"id": call_id, "op": op, "args": args}))
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            # a coordinator that hangs is as good as a dead one
+            self._disconnect()
+            raise ConnectionError(f"The coordinator at {self.path} didn't answer in time") from None
+        finally:
+            self._pending.pop(call_id, None)
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._disconnect()
+        self._down_until = 0.0
+
+
+class SharedRateLimiter(RateLimiter):
+    # A RateLimiter whose budget is kept by a Coordinator, so every process on the host shares it. The rates
+    # given here are used while the coordinator can't be reached, set them to the coordinator's budget divided
+    # by the number of processes so they stay within it together. Priorities only apply to these local limits.
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        rate: float = None,
+        *,
+        burst: float = None,
+        endpoint_rates: Dict[str, Union[float, Tuple[float, float]]] = None,
+        priorities: Dict[str, int] = None,
+        timeout: float = 1.0,
+        retry_interval: float = 5.0,
+    ) -> None:
+        super().__init__(rate, burst = burst, endpoint_rates = endpoint_rates, priorities = priorities)
+        self._channel: _Channel = _Channel(str(path), timeout, retry_interval)
+        self._pauses: set = set()
+        # time.monotonic() of the last slot the coordinator gave this process
+        self._reserved_until: float = 0.0
+        self.fallbacks: int = 0
+
+    def __repr__(self):
+        return "<SharedRateLimiter path={0._channel.path} shared={0.shared} fallbacks={0.fallbacks}>".format(self)
+
+    @property
+    def shared(self) -> bool:
+        return self._channel.connected
+
+    async def acquire(self, endpoint: str, priority: int = None) -> None:
+        try:
+            delay = await self._channel.call("acquire", endpoint = endpoint)
+        except ConnectionError:
+            self.fallbacks += 1
+            # slots the coordinator already gave out are still being used, the local budget only starts after them
+            reserved = self._reserved_until - time.monotonic()
+            if reserved > 0:
+                await asyncio.sleep(reserved)
+            return await super().acquire(endpoint, priority)
+
+        # pauses of this process that couldn't be sent to the coordinator
+        paused = max(self._paused.get(endpoint, 0.0), self._paused.get(None, 0.0)) - time.monotonic()
+        delay = max(delay, paused)
+        self._reserved_until = max(self._reserved_until, time.monotonic() + delay)
+        self.acquired += 1
+        if delay > 0:
+            self.delayed += 1
+            await asyncio.sleep(delay)
+
+    def pause(self, endpoint: str = None, seconds: float = 0.0) -> None:
+        super().pause(endpoint, seconds)
+        if self._channel.connected:
+            # a 429 for one process pauses them all
+            task = asyncio.ensure_future(self._send_pause(endpoint, seconds))
+            self._pauses.add(task)
+            task.add_done_callback(self._pauses.discard)
+
+    async def _send_pause(self, endpoint: Optional[str], seconds: float) -> None:
+        try:
+            await self._channel.call("pause", endpoint = endpoint, seconds = seconds)
+        except (ConnectionError, RuntimeError):
+            pass
+
+    async def coordinator_stats(self) -> Optional[dict]:
+        try:
+            return await self._channel.call("stats")
+        except ConnectionError:
+            return None
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["shared"] = self.shared
+        stats["fallbacks"] = self.fallbacks
+        return stats
+
+    async def close(self) -> None:
+        await self._channel.close()
+
+
+class SharedCache(BaseCache):
+    # A response cache kept by a Coordinator, so a response fetched by one process is a hit for all of them.
+    # Falls back to a ResponseCache of fallback_size entries in this process while the coordinator is down.
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        *,
+        fallback_size: int = 1024,
+        ttls: Dict[str, float] = None,
+        default_ttl: float = None,
+        timeout: float = 1.0,
+        retry_interval: float = 5.0,
+    ) -> None:
+        super().__init__(ttls = ttls, default_ttl = default_ttl)
+        self._channel: _Channel = _Channel(str(path), timeout, retry_interval)
+        self._fallback: ResponseCache = ResponseCache(fallback_size, ttls = {})
+        self.fallbacks: int = 0
+
+    def __repr__(self):
+        return "<SharedCache path={0._channel.path} shared={0.shared} fallbacks={0.fallbacks}>".format(self)
+
+    @property
+    def shared(self) -> bool:
+        return self._channel.connected
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self.get_entry(key)
+        if entry is None or entry[1] <= 0:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return entry[0]
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            entry = await self._channel.call("get", key = key)
+        except ConnectionError:
+            self.fallbacks += 1
+            return await self._fallback.get_entry(key)
+        return (entry[0], entry[1]) if entry is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float, *, stale: float = 0.0) -> None:
+        try:
+            await self._channel.call("set", key = key, value = value, ttl = ttl, stale = stale)
+        except ConnectionError:
+            self.fallbacks += 1
+            await self._fallback.set(key, value, ttl, stale = stale)
+
+    async def delete(self, key: str) -> bool:
+        deleted = await self._fallback.delete(key)
+        try:
+            return await self._channel.call("delete", key = key) or deleted
+        except ConnectionError:
+            return deleted
+
+    async def clear(self) -> None:
+        await self._fallback.clear()
+        try:
+            await self._channel.call("clear")
+        except ConnectionError:
+            pass
+
+    async def close(self) -> None:
+        await self._channel.close()
+
+
+def _endpoint_rate(value: str) -> Tuple[str, Union[float, Tuple[float, float]]]:
+    endpoint, _, limit = value.partition("=")
+    rate, _, burst = limit.partition(":")
+    return endpoint, (float(rate), float(burst)) if burst else float(rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Shared rate limits and response cache for normal_api clients.")
+    parser.add_argument("--socket", required = True, help = "path of the Unix socket")
+    parser.add_argument("--rate", type = float, help = "requests per second of all processes together")
+    parser.add_argument("--burst", type = float)
+    parser.add_argument(
+        "--endpoint-rate", type = _endpoint_rate, action = "append", default = [],
+        help = "endpoint=rate or endpoint=rate:burst, can be repeated"
+    )
+    parser.add_argument("--max-entries", type = int, default = 10000, help = "responses kept in the cache")
+    args = parser.parse_args()
+
+    coordinator = Coordinator(
+        args.socket, rate = args.rate, burst = args.burst, endpoint_rates = dict(args.endpoint_rate),
+        max_entries = args.max_entries,
+    )
+    # no asyncio.run(), it's 3.7+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(coordinator.serve_forever())
+    except KeyboardInterrupt:
+        loop.run_until_complete(coordinator.close())
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
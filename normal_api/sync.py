@@ -0,0 +1,261 @@
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, Awaitable, Callable, Iterable, Iterator, List, Union
+
+from .classes import Image
+from .client import Client
+
+__all__ = ("SyncClient", "SyncImage")
+
+
+class SyncClient:
+    # Runs a Client on an event loop in a background thread, so sync code (and many threads at once)
+    # share one loop and one connection pool. Takes the same options as Client and has the same methods,
+    # they block until the result is there.
+
+    __slots__ = ("_loop", "_thread", "_client", "_closed")
+
+    def __init__(self, **options) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target = self._run_loop, name = "normal_api-sync", daemon = True)
+        self._thread.start()
+        self._closed = False
+        try:
+            # created on the loop, some options create asyncio objects
+            self._client: Client = self.run(self._create_client(options))
+        except BaseException:
+            self._stop()
+            raise
+
+    def __repr__(self):
+        return "<SyncClient client={0._client!r} closed={0._closed}>".format(self)
+
+    def __enter__(self) -> "SyncClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    async def _create_client(options: dict) -> Client:
+        return Client(**options)
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    @property
+    def client(self) -> Client:
+        # for stats and properties, its coroutines have to be run with run()
+        return self._client
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def run(self, coro: Awaitable) -> Any:
+        # Runs a coroutine on the client's loop and waits for the result, e.g. run(client.client.prewarm(5))
+        if self._closed or threading.get_ident() == self._thread.ident:
+            close = getattr(coro, "close", None)
+            if close is not None:
+                close()
+            if self._closed:
+                raise RuntimeError("This SyncClient is closed")
+            raise RuntimeError("SyncClient methods can't be called from its own event loop, await the Client instead")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            # e.g. KeyboardInterrupt while waiting, don't leave the request running
+            future.cancel()
+            raise
+
+    def _wrap(self, result: Any) -> Any:
+        # images, also those of Imgur and RandomEmoji, get blocking methods
+        if isinstance(result, Image):
+            return SyncImage(result, self)
+        if isinstance(getattr(result, "image", None), Image):
+            result.image = SyncImage(result.image, self)
+        return result
+
+    def _iterate(self, iterator) -> Iterator[Any]:
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if not self._closed:
+                self.run(iterator.aclose())
+
+    def map(
+        self,
+        function: Union[str, Callable[..., Awaitable[Any]]],
+        *iterables: Iterable[Any],
+        concurrency: int = 10,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        # Like map(), with the calls running concurrently on the loop. function is the name of a Client
+        # method (e.g. "invite_info") or a coroutine function. Results are in the same order as the input.
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        if isinstance(function, str):
+            function = getattr(self._client, function)
+        elif getattr(function, "__self__", None) is self:
+            # a SyncClient method, use the Client's
+            function = getattr(self._client, function.__name__)
+
+        results = self.run(self._map(function, list(zip(*iterables)), concurrency, return_exceptions))
+        return [self._wrap(result) for result in results]
+
+    @staticmethod
+    async def _map(function, arguments: list, concurrency: int, return_exceptions: bool) -> List[Any]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(args):
+            async with semaphore:
+                return await function(*args)
+
+        tasks = [asyncio.ensure_future(call(args)) for args in arguments]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions = return_exceptions)
+        finally:
+            # gather leaves the other calls running when one raises
+            for task in tasks:
+                task.cancel()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        try:
+            self.run(self._client.close())
+        finally:
+            self._stop()
+
+    def _stop(self) -> None:
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class SyncImage:
+    # An Image of a SyncClient result, its methods block like the client's. Attributes like url and size are the
+    # Image's.
+
+    __slots__ = ("_image", "_sync_client")
+
+    def __init__(self, image: Image, sync_client: SyncClient) -> None:
+        self._image: Image = image
+        self._sync_client: SyncClient = sync_client
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._image, name)
+
+    def __str__(self) -> str:
+        return str(self._image)
+
+    def __repr__(self):
+        return "<SyncImage url={0.url}>".format(self._image)
+
+    def __enter__(self) -> "SyncImage":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+    @property
+    def image(self) -> Image:
+        # the Image itself, its coroutines have to be run with SyncClient.run()
+        return self._image
+
+
+def _sync_method(name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._wrap(self.run(getattr(self._client, name)(*args, **kwargs)))
+
+    return wrapper
+
+
+def _sync_call(name: str, method: Callable) -> Callable:
+    # plain methods also run on the loop, they read state the loop changes
+    async def call(client, args, kwargs):
+        return getattr(client, name)(*args, **kwargs)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.run(call(self._client, args, kwargs))
+
+    return wrapper
+
+
+def _sync_iterator(name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._iterate(getattr(self._client, name)(*args, **kwargs))
+
+    return wrapper
+
+
+for _name, _method in list(vars(Client).items()):
+    if _name.startswith("_") or _name in vars(SyncClient):
+        continue
+    if inspect.iscoroutinefunction(_method):
+        setattr(SyncClient, _name, _sync_method(_name, _method))
+    elif _name.endswith("_many"):
+        # these return async iterators
+        setattr(SyncClient, _name, _sync_iterator(_name, _method))
+    elif inspect.isfunction(_method):
+        setattr(SyncClient, _name, _sync_call(_name, _method))
+
+
+def _sync_image_method(name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._sync_client.run(getattr(self._image, name)(*args, **kwargs))
+
+    return wrapper
+
+
+def _sync_image_iterator(name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._sync_client._iterate(getattr(self._image, name)(*args, **kwargs))
+
+    return wrapper
+
+
+def _sync_image_call(name: str, method: Callable) -> Callable:
+    async def call(image, args, kwargs):
+        return getattr(image, name)(*args, **kwargs)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._sync_client.run(call(self._image, args, kwargs))
+
+    return wrapper
+
+
+for _name, _method in list(vars(Image).items()):
+    if _name.startswith("_") or _name in vars(SyncImage):
+        continue
+    if inspect.iscoroutinefunction(_method):
+        setattr(SyncImage, _name, _sync_image_method(_name, _method))
+    elif inspect.isasyncgenfunction(_method):
+        setattr(SyncImage, _name, _sync_image_iterator(_name, _method))
+    elif inspect.isfunction(_method):
+        setattr(SyncImage, _name, _sync_image_call(_name, _method))
+
+del _name, _method
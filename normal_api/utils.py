@@ -0,0 +1,89 @@
+import json
+import re
+from typing import Any, Callable, List, Pattern, Tuple, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+try:
+    import ujson  # type: ignore
+except ImportError:
+    ujson = None
+
+__all__ = ("JSON_DECODER", "from_json", "split_text")
+
+JSONLoads = Callable[[Union[bytes, str]], Any]
+
+
+def _stdlib_from_json(data: Union[bytes, str]) -> Any:
+    # json.loads() sniffs the encoding of bytes, decoding them first is faster
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+# Fastest installed decoder first
+if orjson is not None:
+    from_json: JSONLoads = orjson.loads
+    JSON_DECODER = "orjson"
+elif ujson is not None:
+    from_json = ujson.loads
+    JSON_DECODER = "ujson"
+else:
+    from_json = _stdlib_from_json
+    JSON_DECODER = "json"
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?\u3002\uff01\uff1f])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _split_on(pattern: Pattern, text: str) -> List[Tuple[str, str]]:
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append((text[position:match.start()], match.group()))
+        position = match.end()
+    parts.append((text[position:], ""))
+    return parts
+
+
+def split_text(text: str, max_length: int) -> List[Tuple[str, str]]:
+    # Splits text into (chunk, whitespace after it) pairs of at most max_length characters, on sentence ends if
+    # possible, otherwise on whitespace or anywhere. Joining chunk + whitespace of every pair gives the text back,
+    # whitespace at the start of the text is a first pair with an empty chunk.
+    if max_length < 1:
+        raise ValueError("max_length must be at least 1")
+
+    stripped = text.lstrip()
+    leading = text[:len(text) - len(stripped)]
+    if not stripped:
+        return [("", leading)]
+
+    units = []
+    for sentence, space in _split_on(_SENTENCE_END, stripped):
+        if len(sentence) <= max_length:
+            units.append((sentence, space))
+            continue
+        for word, word_space in _split_on(_WHITESPACE, sentence):
+            pieces = [word[start:start + max_length] for start in range(0, len(word), max_length)] or [""]
+            units.extend((piece, "") for piece in pieces[:-1])
+            units.append((pieces[-1], word_space))
+        units[-1] = (units[-1][0], space)
+
+    chunks = [("", leading)] if leading else []
+    current, current_space = "", ""
+    for unit, space in units:
+        if not unit:
+            current_space += space
+            continue
+        if current and len(current) + len(current_space) + len(unit) > max_length:
+            chunks.append((current, current_space))
+            current = unit
+        else:
+            current = f"{current}{current_space}{unit}"
+        current_space = space
+    chunks.append((current, current_space))
+    return chunks
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from typing import Mapping, Optional, Tuple
+
+from .cache import CacheStats
+
+__all__ = ("VoteIndex", "VOTE_WINDOW")
+
+# seconds a top.gg vote counts
+VOTE_WINDOW = 12 * 60 * 60
+
+
+class VoteIndex:
+    # Remembers has_voted_on_topgg() results per (bot, user). A vote counts for 12 hours, but the API doesn't say
+    # when the user voted, so a positive result may run out any moment and is only kept for positive_ttl seconds.
+    # A vote that was pushed from a webhook is kept until its window ends. Users that didn't vote may do so any
+    # moment, negative results are only kept for negative_ttl seconds.
+
+    def __init__(
+        self,
+        *,
+        positive_ttl: float = 300.0,
+        negative_ttl: float = 60.0,
+        max_entries: int = 100000,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.positive_ttl: float = positive_ttl
+        self.negative_ttl: float = negative_ttl
+        self.max_entries: int = max_entries
+        self.stats: CacheStats = CacheStats()
+        self.pushed: int = 0
+        # (bot id, user id): (voted, expires), expires is a time.time() so pushed vote times can be used
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[bool, float]]" = OrderedDict()
+
+    def __repr__(self):
+        return "<VoteIndex entries={0} positive_ttl={1.positive_ttl} negative_ttl={1.negative_ttl}>".format(
+            len(self), self
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, bot_id: int, user_id: int) -> Optional[bool]:
+        # None if it isn't known or expired
+        key = (int(bot_id), int(user_id))
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry[0]
+
+    def set(self, bot_id: int, user_id: int, voted: bool) -> None:
+        key = (int(bot_id), int(user_id))
+        if voted:
+            expires = time.time() + self.positive_ttl
+            current = self._entries.get(key)
+            if current is not None and current[0]:
+                # a pushed vote knows when its window ends, that's kept
+                expires = max(expires, current[1])
+        else:
+            expires = time.time() + self.negative_ttl
+        self._store(key, voted, expires)
+
+    def push_vote(self, bot_id: int, user_id: int, *, voted_at: float = None) -> None:
+        # A vote received from elsewhere, e.g. top.gg's webhook. voted_at is a time.time(), defaults to now.
+        voted_at = time.time() if voted_at is None else voted_at
+        self._store((int(bot_id), int(user_id)), True, voted_at + VOTE_WINDOW)
+        self.pushed += 1
+
+    def push_event(self, payload: Mapping) -> None:
+        # The JSON body of a top.gg vote webhook. The "Test" button of top.gg's dashboard sends type "test", that's
+        # not a vote.
+        if payload.get("type") == "test":
+            return
+        self.push_vote(int(payload["bot"]), int(payload["user"]))
+
+    def _store(self, key: Tuple[int, int], voted: bool, expires: float) -> None:
+        if expires <= time.time():
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (voted, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last = False)
+            self.stats.evictions += 1
+
+    def invalidate(self, bot_id: int, user_id: int) -> bool:
+        return self._entries.pop((int(bot_id), int(user_id)), None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
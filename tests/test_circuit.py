@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+import normal_api
+
+
+async def _serve(latency: float):
+    async def ordinal(request):
+        await asyncio.sleep(latency)
+        return web.json_response({"ordinal": "1st"})
+
+    app = web.Application()
+    app.router.add_get("/ordinal", ordinal)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.parametrize("error", [normal_api.DeadlineExceeded(), None])
+def test_is_failure_ignores_deadlines(error):
+    assert not normal_api.is_failure(error)
+
+
+def test_short_deadlines_leave_the_breaker_closed():
+    async def main():
+        runner, port = await _serve(0.05)
+        breaker = normal_api.CircuitBreaker(failure_threshold = 2)
+        limiter = normal_api.ConcurrencyLimiter(10)
+        client = normal_api.Client(
+            api_url = [f"http://127.0.0.1:{port}/", f"http://localhost:{port}/"],
+            circuit_breaker = breaker,
+            concurrency_limiter = limiter,
+        )
+        try:
+            for _ in range(5):
+                with pytest.raises(normal_api.DeadlineExceeded):
+                    await client.ordinal(1, timeout = 0.02)
+
+            assert breaker.state("ordinal") == "closed"
+            assert all(base["healthy"] and not base["failures"] for base in client.router.stats()["bases"].values())
+            assert limiter.limit("ordinal") == 10
+            assert await client.ordinal(1, timeout = 5) == "1st"
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+import normal_api
+
+IMAGE = b"\x89PNG" + b"\x00" * 4096
+
+
+async def _serve(app: web.Application):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+
+def _image_app(body: bytes = IMAGE, requests: list = None) -> web.Application:
+    async def image(request):
+        if requests is not None:
+            requests.append(request.path)
+        await asyncio.sleep(0.01)
+        return web.Response(body = body, content_type = "image/png")
+
+    app = web.Application()
+    app.router.add_get("/image.png", image)
+    return app
+
+
+def test_save_to_keeps_the_file_when_the_image_is_too_large(tmp_path):
+    path = tmp_path / "emoji.png"
+    path.write_bytes(b"old")
+
+    async def main():
+        runner, url = await _serve(_image_app())
+        session = normal_api.HTTPSession()
+        try:
+            image = normal_api.Image(f"{url}image.png", session = session)
+            with pytest.raises(normal_api.ImageTooLarge):
+                await image.save_to(path, max_size = 10)
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
+    assert path.read_bytes() == b"old"
+    assert [file.name for file in tmp_path.iterdir()] == ["emoji.png"]
+
+
+def test_save_to_replaces_the_file(tmp_path):
+    path = tmp_path / "emoji.png"
+    path.write_bytes(b"old")
+
+    async def main():
+        runner, url = await _serve(_image_app())
+        session = normal_api.HTTPSession()
+        try:
+            image = normal_api.Image(f"{url}image.png", session = session)
+            return await image.save_to(path)
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    assert asyncio.run(main()) == len(IMAGE)
+    assert path.read_bytes() == IMAGE
+    assert [file.name for file in tmp_path.iterdir()] == ["emoji.png"]
+
+
+def test_concurrent_reads_request_the_image_once():
+    async def main():
+        requests = []
+        runner, url = await _serve(_image_app(requests = requests))
+        session = normal_api.HTTPSession()
+        try:
+            image = normal_api.Image(f"{url}image.png", session = session)
+            bodies = await asyncio.gather(*(image.read(bytesio = False) for _ in range(5)))
+            assert session.pool_stats()["active"] == 0
+        finally:
+            await session.close()
+            await runner.cleanup()
+        return bodies, len(requests)
+
+    bodies, requests = asyncio.run(main())
+    assert bodies == [IMAGE] * 5
+    assert requests == 1
+
+
+def test_reads_after_release_get_a_new_timeout():
+    async def main():
+        runner, url = await _serve(_image_app())
+        session = normal_api.HTTPSession()
+        try:
+            response = await session.request(f"{url}image.png")
+            deadline = time.monotonic() + 0.2
+            image = normal_api.Image(f"{url}image.png", response, session = session, deadline = deadline, timeout = 5)
+            image.release()
+            await asyncio.sleep(0.3)
+            return await image.read(bytesio = False)
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    assert asyncio.run(main()) == IMAGE
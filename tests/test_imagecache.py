@@ -0,0 +1,44 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import normal_api
+
+IMAGE = b"\x89PNG" + b"\x00" * 4096
+
+
+def test_concurrent_sets_of_the_same_bytes(tmp_path):
+    cache = normal_api.ImageCache(directory = tmp_path)
+
+    async def main():
+        return await asyncio.gather(*(cache.set(f"https://example.com/{index}.png", IMAGE) for index in range(20)))
+
+    digests = asyncio.run(main())
+    assert len(set(digests)) == 1 and digests[0] is not None
+    assert cache.disk_errors == 0
+    assert not [path for path in tmp_path.rglob("*.tmp")]
+    assert asyncio.run(normal_api.ImageCache(directory = tmp_path).get("https://example.com/7.png")) == IMAGE
+
+
+def test_threads_writing_the_same_file(tmp_path):
+    path = str(tmp_path / "blobs" / "ab" / "abcdef")
+    with ThreadPoolExecutor(16) as executor:
+        for result in [executor.submit(normal_api.ImageCache._write_file, path, IMAGE) for _ in range(200)]:
+            result.result()
+    assert [file.name for file in (tmp_path / "blobs" / "ab").iterdir()] == ["abcdef"]
+
+
+def test_unusable_directory_keeps_images_in_memory(tmp_path):
+    # a file where the directory should be, every write fails
+    directory = tmp_path / "cache"
+    directory.write_bytes(b"")
+    cache = normal_api.ImageCache(directory = directory)
+
+    async def main():
+        digest = await cache.set("https://example.com/a.png", IMAGE)
+        return digest, await cache.get("https://example.com/a.png"), await cache.get("https://example.com/b.png")
+
+    digest, body, missing = asyncio.run(main())
+    assert digest is not None
+    assert body == IMAGE
+    assert missing is None
+    assert cache.disk_errors == 1
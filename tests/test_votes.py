@@ -0,0 +1,29 @@
+import time
+
+import normal_api
+
+
+def test_push_event_ignores_test_webhooks():
+    votes = normal_api.VoteIndex()
+    votes.push_event({"bot": "1", "user": "2", "type": "test", "isWeekend": False})
+    assert votes.get(1, 2) is None
+    assert votes.pushed == 0
+
+    votes.push_event({"bot": "1", "user": "2", "type": "upvote", "isWeekend": False})
+    assert votes.get(1, 2) is True
+    assert votes.pushed == 1
+
+
+def test_checked_votes_are_kept_briefly():
+    votes = normal_api.VoteIndex()
+    votes.set(1, 2, True)
+    # the vote may have been cast up to 12 hours before the check
+    assert votes._entries[(1, 2)][1] <= time.time() + votes.positive_ttl < time.time() + normal_api.VOTE_WINDOW
+
+
+def test_checks_keep_the_window_of_a_pushed_vote():
+    votes = normal_api.VoteIndex()
+    votes.push_vote(1, 2, voted_at = time.time() - 3600)
+    pushed = votes._entries[(1, 2)][1]
+    votes.set(1, 2, True)
+    assert votes._entries[(1, 2)][1] == pushed